@@ -0,0 +1,336 @@
+"""
+Benchmark and accuracy regression suite for pokerlib.
+
+Measures evaluations per second, Monte Carlo trials per second for each
+street and opponent count, bytes allocated per trial, and how far seeded
+Monte Carlo estimates land from exact enumerated equities. Results are
+printed as one JSON object on stdout (progress goes to stderr):
+
+    python bench.py                        # full run on a desktop
+    python bench.py --quick                # reduced run, also works under MicroPython
+    python bench.py --output base.json     # save the results as a baseline
+    python bench.py --baseline base.json   # exit 1 on regressions against it
+
+Throughput may drop by --tolerance (default 0.5, i.e. 50%) before it counts
+as a regression. That default is what was validated. Seven back-to-back
+full runs of the same code on a shared single-core VM had single metrics
+up to 47% apart, and five --quick runs up to 40%, mostly from the whole
+machine slowing down for a run at a time. On a quiet, dedicated machine a
+lower --tolerance works. Timings are taken in REPEATS rounds over the
+whole suite, keeping each metric's best.
+
+Allocations may grow by ALLOC_SLACK bytes per trial, and never past
+MAX_BYTES_PER_TRIAL. Accuracy is checked on its own: every estimate must fall within MAX_Z
+standard errors of the exact value.
+"""
+import gc
+import json
+import math
+import sys
+
+import pokerlib
+
+try:
+    from time import perf_counter as now
+except ImportError:
+    try:
+        from time import monotonic_ns as _ns
+    except ImportError:
+        from time import time_ns as _ns
+
+    def now():
+        return _ns() / 1000000000
+
+SEED = 20240601
+TOLERANCE = 0.5
+ALLOC_SLACK = 1.0
+# Trials reuse their buffers, so allocations must stay under this regardless of baseline
+MAX_BYTES_PER_TRIAL = 1.0
+MAX_Z = 4.0
+# Timed metrics are measured in this many rounds over the whole suite and
+# keep their best, which is steadier on a busy machine
+REPEATS = 5
+
+# (street, board) pairs timed for each opponent count; the hero holds AhKh
+HERO = ['hA', 'hK']
+STREETS = [
+    ('preflop', []),
+    ('flop', ['h7', 'd8', 'c9']),
+    ('turn', ['h7', 'd8', 'c9', 's2']),
+    ('river', ['h7', 'd8', 'c9', 's2', 'dJ']),
+]
+OPPONENTS = [1, 3, 8]
+QUICK_STREETS = ['flop', 'river']
+QUICK_OPPONENTS = [1, 3]
+
+# Spots with exact references, as (hole cards, board, opponents, opponent range,
+# in quick runs). A '100%' range must match the equity against random hands.
+ACCURACY_SPOTS = [
+    (['c5', 'c6'], ['h7', 'd8', 'c9', 's2', 'dJ'], 2, None, True),
+    (['s10', 'c10'], ['h7', 'd8', 'c9', 's2', 'h3'], 1, None, True),
+    (['d4', 's4'], ['hA', 'dK', 'c4', 's9', 'h2'], 2, None, True),
+    (['s10', 'c10'], ['h7', 'd8', 'c9', 's2', 'h3'], 2, '100%', True),
+    (['hA', 'dA'], ['h7', 'd8', 'c9', 's2'], 1, None, False),
+    (['hK', 'hQ'], ['h7', 'd8', 'h9', 's2'], 1, None, False),
+    (['sJ', 's10'], ['s2', 's7', 'dQ', 'c9'], 1, None, False),
+    (['hA', 'dA'], ['h7', 'd8', 'c9'], 1, None, False),
+    (['hA', 'dA'], ['h7', 'd8', 'c9'], 1, '100%', False),
+]
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def random_hands(count, size=7):
+    """Deterministic list of random size-card integer hands"""
+    rng = pokerlib.XorShift(SEED)
+    hands = []
+    for _ in range(count):
+        dealer = pokerlib.Dealer([], rng)
+        hands.append(list(dealer.deal(size)[:size]))
+    return hands
+
+
+def evals_per_sec(evaluate, hands, duration):
+    """Calls of evaluate(hand) per second over about duration, cycling through hands"""
+    count = 0
+    start = now()
+    elapsed = 0
+    while elapsed < duration:
+        for hand in hands:
+            evaluate(hand)
+        count += len(hands)
+        elapsed = now() - start
+    return count / elapsed
+
+
+def trials_per_sec(calc, player, board, num_opponents, duration, batch):
+    """Monte Carlo trials per second for one situation over about duration"""
+    calc.rng = pokerlib.XorShift(SEED)
+    calc.simulate(player, board, num_opponents, batch)
+    trials = 0
+    start = now()
+    elapsed = 0
+    while elapsed < duration:
+        calc.simulate(player, board, num_opponents, batch)
+        trials += batch
+        elapsed = now() - start
+    return trials / elapsed
+
+
+def bytes_per_trial(calc, player, board, num_opponents, trials=1000):
+    """
+    Bytes allocated per Python-loop trial. A short and a long run are
+    compared so per-query setup cancels out.
+    """
+    calc.simulate(player, board, num_opponents, 10)
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        calc.simulate(player, board, num_opponents, 10)
+        short_run = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        calc.simulate(player, board, num_opponents, 10 + trials)
+        long_run = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        gc.collect()
+        gc.disable()
+        free = gc.mem_free()
+        calc.simulate(player, board, num_opponents, 10)
+        short_run = free - gc.mem_free()
+        free = gc.mem_free()
+        calc.simulate(player, board, num_opponents, 10 + trials)
+        long_run = free - gc.mem_free()
+        gc.enable()
+    return (long_run - short_run) / trials
+
+
+def accuracy(calc, spots, simulations):
+    """
+    (max |error|, max z-score) of seeded Monte Carlo estimates against exact
+    enumeration, where z uses the binomial standard error of the estimate
+    """
+    max_error = 0
+    max_z = 0
+    for hole, board, num_opponents, opponent_range, _ in spots:
+        player = pokerlib.cards_to_ints(hole)
+        community = pokerlib.cards_to_ints(board)
+        exact = calc.enumerate_win_probability(player, community, num_opponents)
+        compiled = None
+        if opponent_range is not None:
+            compiled = calc.compile_ranges(opponent_range, num_opponents)
+        calc.rng = pokerlib.XorShift(SEED)
+        estimate = calc.simulate(player, community, num_opponents, simulations, compiled) / simulations
+        error = abs(estimate - exact)
+        stderr = math.sqrt(max(exact * (1 - exact), 1e-6) / simulations)
+        max_error = max(max_error, error)
+        max_z = max(max_z, error / stderr)
+    return max_error, max_z
+
+
+def engines(quick):
+    """(name, calculator) pairs to time; NumPy only on full desktop runs"""
+    found = [
+        ('python', pokerlib.PokerCalculator(preflop=False, backend=None, cache_size=0)),
+        ('reduced', pokerlib.PokerCalculator(preflop=False, backend=None, cache_size=0,
+                                             variance_reduction=True)),
+    ]
+    if not quick:
+        try:
+            import pokerlib_np
+        except ImportError:
+            pokerlib_np = None
+        if pokerlib_np is not None:
+            backend = pokerlib_np.NumpyBackend(seed=SEED)
+            found.append(('numpy', pokerlib.PokerCalculator(preflop=False, backend=backend,
+                                                            cache_size=0)))
+    return found
+
+
+def run(quick=False):
+    """Run every benchmark and return a flat dict of metric name -> value"""
+    duration = 0.1 if quick else 0.4
+    metrics = {}
+
+    # Timed metrics as (name, function, args). Each runs once per round and
+    # keeps its best, so a slow spell on a busy machine costs one round of
+    # one metric rather than the metric
+    jobs = []
+    hands = random_hands(200 if quick else 1000)
+    jobs.append(('evals_per_sec.evaluate_ints', evals_per_sec, (pokerlib.evaluate_ints, hands, duration)))
+    # The string API, as code.py calls it: two hole cards plus a full board
+    calc = pokerlib.PokerCalculator(preflop=False, backend=None, cache_size=0)
+    string_hands = [[pokerlib.int_to_card(c) for c in hand] for hand in hands]
+
+    def best_hand(cards):
+        return calc.get_best_hand(cards[:2], cards[2:])
+    jobs.append(('evals_per_sec.get_best_hand', evals_per_sec, (best_hand, string_hands, duration)))
+    tables = None
+    if not quick:
+        try:
+            tables = pokerlib.EvalTables()
+            tables.load()
+        except OSError:
+            tables = None
+        if tables is not None:
+            jobs.append(('evals_per_sec.tables', evals_per_sec, (tables.evaluate, hands, duration)))
+
+    player = pokerlib.cards_to_ints(HERO)
+    for engine, calc in engines(quick):
+        batch = 50000 if engine == 'numpy' else 200
+        for street, board_cards in STREETS:
+            if quick and street not in QUICK_STREETS:
+                continue
+            board = pokerlib.cards_to_ints(board_cards)
+            for num_opponents in OPPONENTS:
+                if quick and num_opponents not in QUICK_OPPONENTS:
+                    continue
+                if engine == 'reduced' and not calc.uses_reduced_sampler(board, num_opponents):
+                    continue
+                name = 'trials_per_sec.%s.%s.%d' % (engine, street, num_opponents)
+                jobs.append((name, trials_per_sec, (calc, player, board, num_opponents, duration, batch)))
+
+    for _ in range(REPEATS):
+        for name, function, args in jobs:
+            metrics[name] = max(metrics.get(name, 0), function(*args))
+    if tables is not None:
+        tables.close()
+    for name, _, _ in jobs:
+        log('%-36s %12.0f' % (name, metrics[name]))
+
+    calc = pokerlib.PokerCalculator(preflop=False, backend=None, cache_size=0)
+    board = pokerlib.cards_to_ints(STREETS[1][1])
+    for num_opponents in QUICK_OPPONENTS:
+        name = 'bytes_per_trial.flop.%d' % num_opponents
+        metrics[name] = bytes_per_trial(calc, player, board, num_opponents)
+        log('%-36s %12.2f' % (name, metrics[name]))
+
+    spots = [spot for spot in ACCURACY_SPOTS if spot[4] or not quick]
+    simulations = 2000 if quick else 20000
+    for engine, calc in engines(quick):
+        max_error, max_z = accuracy(calc, spots, simulations)
+        metrics['accuracy.%s.max_error' % engine] = max_error
+        metrics['accuracy.%s.max_z' % engine] = max_z
+        log('%-36s %12.4f  (z = %.2f)' % ('accuracy.%s' % engine, max_error, max_z))
+    return metrics
+
+
+def regressions(metrics, baseline, tolerance=TOLERANCE):
+    """Messages for every metric that regressed against baseline"""
+    failures = []
+    for name in sorted(metrics):
+        value = metrics[name]
+        if name.endswith('.max_z'):
+            if value > MAX_Z:
+                failures.append('%s: %.2f exceeds %.1f' % (name, value, MAX_Z))
+            continue
+        if name.startswith('bytes_per_trial.') and value > MAX_BYTES_PER_TRIAL:
+            failures.append('%s: %.2f exceeds %.1f' % (name, value, MAX_BYTES_PER_TRIAL))
+            continue
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if name.startswith('evals_per_sec.') or name.startswith('trials_per_sec.'):
+            if value < base * (1 - tolerance):
+                failures.append('%s: %.0f is %.0f%% below baseline %.0f'
+                                % (name, value, 100 * (1 - value / base), base))
+        elif name.startswith('bytes_per_trial.'):
+            if value > base + ALLOC_SLACK:
+                failures.append('%s: %.2f up from baseline %.2f' % (name, value, base))
+    return failures
+
+
+def main(argv):
+    quick = False
+    baseline_path = None
+    output_path = None
+    tolerance = TOLERANCE
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg == '--quick':
+            quick = True
+        elif arg in ('--baseline', '--output', '--tolerance') and i + 1 < len(argv):
+            i += 1
+            if arg == '--baseline':
+                baseline_path = argv[i]
+            elif arg == '--output':
+                output_path = argv[i]
+            else:
+                tolerance = float(argv[i])
+        else:
+            log('usage: bench.py [--quick] [--baseline FILE] [--output FILE] [--tolerance FRACTION]')
+            return 2
+        i += 1
+
+    metrics = run(quick)
+    baseline = {}
+    if baseline_path is not None:
+        with open(baseline_path) as f:
+            baseline = json.load(f)['metrics']
+    failures = regressions(metrics, baseline, tolerance)
+
+    result = {
+        'mode': 'quick' if quick else 'full',
+        'implementation': sys.implementation.name,
+        'platform': sys.platform,
+        'metrics': metrics,
+        'failures': failures,
+    }
+    if output_path is not None:
+        with open(output_path, 'w') as f:
+            f.write(json.dumps(result))
+    else:
+        print(json.dumps(result))
+    for failure in failures:
+        log('REGRESSION ' + failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
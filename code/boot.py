@@ -0,0 +1,22 @@
+# Enable the second USB serial port used by code.py's offload mode
+# (OFFLOAD = True); the REPL console stays on the first one.
+# Changes here take effect after a hard reset.
+import usb_cdc
+
+usb_cdc.enable(console=True, data=True)
+
+# Let code.py write its equity cache (EQUITY_CACHE_PATH) to the drive. This
+# makes the drive read-only to the computer, so hold the encoder button
+# while resetting to get write access back for updating the code.
+WRITABLE_CACHE = False
+
+if WRITABLE_CACHE:
+    import board
+    import storage
+    from digitalio import DigitalInOut, Pull
+
+    button = DigitalInOut(board.GP11)
+    button.pull = Pull.UP
+    if button.value:
+        storage.remount("/", readonly=False)
+    button.deinit()
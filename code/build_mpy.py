@@ -0,0 +1,42 @@
+"""
+Build-time packager for the CIRCUITPY drive. Precompiles the device modules
+to .mpy bytecode with mpy-cross, so the board loads them without compiling
+source at boot, and copies the rest of what the device needs:
+
+    python build_mpy.py [output_dir]
+
+mpy-cross must match the CircuitPython version on the board (download it
+from the CircuitPython releases); set MPY_CROSS to its path if it isn't on
+PATH. Copy the contents of output_dir (default build/) to the drive, and
+delete any .py copies of the same modules there, since .py wins over .mpy.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+# Imported by code.py on the device; desktop-only modules stay out
+DEVICE_MODULES = ['cards', 'pokerlib', 'ranges', 'preflop_table', 'offload']
+# code.py and boot.py must stay source: CircuitPython runs them by name
+COPIED_FILES = ['code.py', 'boot.py', 'evaltables.bin']
+
+
+def build(output_dir, mpy_cross):
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.makedirs(output_dir, exist_ok=True)
+    for module in DEVICE_MODULES:
+        source = os.path.join(here, module + '.py')
+        target = os.path.join(output_dir, module + '.mpy')
+        start = time.perf_counter()
+        subprocess.run([mpy_cross, '-o', target, source], check=True)
+        print('%-20s %7d bytes  %.2fs' % (module + '.mpy', os.path.getsize(target),
+                                          time.perf_counter() - start))
+    for name in COPIED_FILES:
+        shutil.copyfile(os.path.join(here, name), os.path.join(output_dir, name))
+        print('%-20s %7d bytes' % (name, os.path.getsize(os.path.join(output_dir, name))))
+
+
+if __name__ == '__main__':
+    output = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    build(output, os.environ.get('MPY_CROSS', 'mpy-cross'))
@@ -1,44 +1,45 @@
-def select_suit(selection, used_cards=None):
-    suits = ['h', 'd', 'c', 's']
-    if used_cards is None:
-        return suits[selection % len(suits)]
-    
-    # Filter out suits that have no available ranks
-    available_suits = []
-    for suit in suits:
-        for rank in ['A', 'K', 'Q', 'J', '10', '9', '8', '7', '6', '5', '4', '3', '2', '1']:
-            if (suit, rank) not in used_cards:
-                available_suits.append(suit)
-                break
-    
-    if not available_suits:
-        return suits[0]  # Fallback if all cards are used
-    
-    return available_suits[selection % len(available_suits)]
+# Cards are small integers shared with pokerlib: card = rank_index * 4 + suit_index,
+# where rank_index follows RANKS (0 = '2' ... 12 = 'A') and suit_index follows SUITS.
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+SUITS = ['h', 'd', 'c', 's']  # hearts, diamonds, clubs, spades
 
-def select_rank(selection, suit, used_cards=None):
-    ranks = ['A', 'K', 'Q', 'J', '10', '9', '8', '7', '6', '5', '4', '3', '2', '1']
-    if used_cards is None:
-        return ranks[selection % len(ranks)]
-    
-    # Filter out ranks that are already used with this suit
-    available_ranks = []
-    for rank in ranks:
-        if (suit, rank) not in used_cards:
-            available_ranks.append(rank)
-    
-    if not available_ranks:
-        return ranks[0]  # Fallback if all ranks are used for this suit
-    
-    return available_ranks[selection % len(available_ranks)]
+class CardIndex:
+    """
+    The cards still available for selection. Updated only when a card is
+    used or everything is reset, so picking the nth available suit or rank
+    for an encoder position is a single list lookup.
+    """
+    def __init__(self):
+        self.reset()
 
-def set_hand(encoder, last_position, btn, suit, rank):
-    position = encoder.position
-    if last_position is None or position != last_position:
-        if suit == None:
-            encoder_area.text = f"{select_suit(position)}_"
-        else:
-            encoder_area.text = f"{suit}{select_rank(position)}"
-    last_position = position
-    if not btn.value:
-        suit = select_suit(position)
\ No newline at end of file
+    def reset(self):
+        self.used = bytearray(52)
+        # Suit indexes with a rank left, and per suit the rank indexes left
+        # in encoder order (aces first)
+        self.suits = [0, 1, 2, 3]
+        self.ranks = [list(range(len(RANKS) - 1, -1, -1)) for _ in SUITS]
+
+    def use(self, card):
+        """Take an integer card out of selection"""
+        if self.used[card]:
+            return
+        self.used[card] = 1
+        suit = card & 3
+        ranks = self.ranks[suit]
+        ranks.remove(card >> 2)
+        if not ranks:
+            self.suits.remove(suit)
+
+    def suit(self, position):
+        """The suit index at an encoder position"""
+        suits = self.suits
+        if not suits:
+            return 0  # Fallback if all cards are used
+        return suits[position % len(suits)]
+
+    def rank(self, position, suit):
+        """The rank index at an encoder position among the ranks left in suit"""
+        ranks = self.ranks[suit]
+        if not ranks:
+            return len(RANKS) - 1  # Fallback if all ranks are used for this suit
+        return ranks[position % len(ranks)]
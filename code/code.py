@@ -1,5 +1,10 @@
 # Raspberry Pi Pico
 
+import time
+BOOT_START_NS = time.monotonic_ns()
+# Time from power-up (once code.py runs) to the first input being read
+BOOT_BUDGET_MS = 500
+
 import board,busio # type: ignore
 from time import sleep
 from adafruit_st7735r import ST7735R
@@ -7,20 +12,42 @@ import displayio
 import terminalio
 from adafruit_display_text import label
 import fourwire
-import time
 
 from digitalio import DigitalInOut, Direction, Pull
 
 import rotaryio
 
-from cards import *
-import pokerlib as pokerlib
+from cards import RANKS, SUITS, CardIndex
+
+# Set PROFILE to print the engine's phase timers and counters over serial
+# after every calculation
+PROFILE = False
+
+# Finished equities are kept in this file so they survive restarts (None
+# disables it). Writing needs WRITABLE_CACHE = True in boot.py; without it
+# the records already there are still used.
+EQUITY_CACHE_PATH = "/equity_cache.bin"
+
+def log_engine_stats(profiler):
+    print("Engine:", profiler.summary())
+    profiler.reset()
+
+# The engine is imported and set up on first use (or in idle time once the
+# first card is being picked), so boot only has to draw the screen
+poker_calc = None
 
-# Initialize poker calculator
-poker_calc = pokerlib.PokerCalculator()
+def get_poker_calc():
+    global poker_calc
+    if poker_calc is None:
+        import pokerlib
+        profiler = pokerlib.Profiler(log_engine_stats) if PROFILE else None
+        persistent_cache = None
+        if EQUITY_CACHE_PATH is not None:
+            persistent_cache = pokerlib.PersistentEquityCache(EQUITY_CACHE_PATH)
+        poker_calc = pokerlib.PokerCalculator(profiler=profiler, persistent_cache=persistent_cache)
+    return poker_calc
 
 encoder = rotaryio.IncrementalEncoder(board.GP14, board.GP15)
-last_position = None
 
 btn = DigitalInOut(board.GP11)
 btn.direction = Direction.INPUT
@@ -52,6 +79,38 @@ color_palette[0] = 0x000000  # Black background
 bg_sprite = displayio.TileGrid(color_bitmap, pixel_shader=color_palette, x=0, y=0)
 splash.append(bg_sprite)
 
+# Labels are only written when their text or color actually changes: the loop
+# sets what each label should show and flush_screen() sends the differences
+dirty_labels = []
+
+class ScreenLabel:
+    """The wanted text and color of a label, next to what is drawn"""
+    def __init__(self, area):
+        self.area = area
+        self.normal_color = area.color
+        self.text = self.drawn_text = area.text
+        self.color = self.drawn_color = area.color
+        self.dirty = False
+    
+    def set(self, text=None, color=None):
+        if text is not None:
+            self.text = text
+        if color is not None:
+            self.color = color
+        if not self.dirty and (self.text != self.drawn_text or self.color != self.drawn_color):
+            self.dirty = True
+            dirty_labels.append(self)
+
+def flush_screen():
+    """Write pending label changes to the display"""
+    for screen_label in dirty_labels:
+        if screen_label.text != screen_label.drawn_text:
+            screen_label.area.text = screen_label.drawn_text = screen_label.text
+        if screen_label.color != screen_label.drawn_color:
+            screen_label.area.color = screen_label.drawn_color = screen_label.color
+        screen_label.dirty = False
+    del dirty_labels[:]
+
 # Create title at the top
 title_group = displayio.Group(scale=1, x=50, y=10)
 title_text = "Poker"
@@ -66,32 +125,183 @@ percentage_text = "0%"
 percentage_area = label.Label(terminalio.FONT, text=percentage_text, color=0xFFFF00)
 percentage_group.append(percentage_area)
 splash.append(percentage_group)
+percentage_label = ScreenLabel(percentage_area)
+
+# Equity settings: the calculation runs a few trials per loop pass so the
+# encoder and button stay responsive while it refines. It runs as many
+# trials as fit in EQUITY_BUDGET_MS of engine time, using the engine's
+# throughput model (calibrated in idle time once the engine is loaded).
+NUM_OPPONENTS = 3
+OPPONENT_RANGE = None  # e.g. "22+,A2s+,KTo+" or "25%"; None means any two cards
+EQUITY_BUDGET_MS = 1000
+TARGET_WIDTH = 0.04  # stop once the 95% interval is narrower than +/-2%
+EQUITY_SLICE_NS = 10000000  # 10ms of engine time per loop pass
+
+# Offload mode: send each calculation to offload_host.py on a computer over
+# the USB data port (enabled in boot.py). The local engine takes over when
+# the host hasn't answered within OFFLOAD_DEADLINE_MS.
+OFFLOAD = False
+OFFLOAD_DEADLINE_MS = 300
+
+equity_task = None
+equity_samples = 0  # Trials behind the estimate shown
+
+offload_client = None
+if OFFLOAD:
+    import usb_cdc
+    if usb_cdc.data is not None:
+        import offload
+        usb_cdc.data.timeout = 0
+        offload_client = offload.OffloadClient(usb_cdc.data)
+# Cards of the query waiting for the host's first answer, and of the latest query
+offload_pending = None
+offload_query = None
+offload_deadline_ns = 0
+host_answering = False
+
+# While a flop, turn or river rank is being picked, the board with the card
+# under the cursor is calculated ahead in idle time; pressing the button on
+# that card takes over the speculative calculation and its latest estimate
+speculative_board = None
+speculative_task = None
+speculative_estimate = None
+
+def current_cards():
+    """The selected hole cards and community cards as engine integer cards"""
+    player_cards = [rank * 4 + suit, rank2 * 4 + suit2]
+    community_cards = []
+    # Add community cards if both suit and rank are set
+    for i in range(5):
+        if river_suits[i] is not None and river_ranks[i] is not None:
+            community_cards.append(river_ranks[i] * 4 + river_suits[i])
+    return player_cards, community_cards
+
+def start_equity(player_cards, community_cards):
+    """Win probability against NUM_OPPONENTS, refined one trial at a time"""
+    # Enumeration isn't time-sliced, so stick to Monte Carlo here
+    return get_poker_calc().iter_int_win_probability(
+        player_cards, community_cards, num_opponents=NUM_OPPONENTS, batch_size=None,
+        max_simulations=None, target_width=TARGET_WIDTH, exact=False,
+        opponent_ranges=OPPONENT_RANGE, budget_ms=EQUITY_BUDGET_MS
+    )
+
+def run_equity_slice(task):
+    """
+    Advance an equity calculation for one time slice: (latest estimate or
+    None, trials run so far, still running)
+    """
+    estimate = None
+    samples_done = 0
+    deadline = time.monotonic_ns() + EQUITY_SLICE_NS
+    try:
+        while time.monotonic_ns() < deadline:
+            estimate, stderr, samples_done = next(task)
+    except StopIteration:
+        return estimate, samples_done, False
+    return estimate, samples_done, True
 
 def calculate_win_percentage():
-    """Calculate and display win percentage based on current cards"""
+    """Start (or restart) the win percentage calculation for the current cards"""
+    global equity_task, offload_pending
+    equity_task = None
+    offload_pending = None
+    if offload_client is not None:
+        offload_client.cancel()
     # Only calculate if we have both hole cards
     if suit is not None and rank is not None and suit2 is not None and rank2 is not None:
-        player_cards = []
-        community_cards = []
-        
-        suit_lower = suit.lower()
-        player_cards.append(f"{suit_lower}{rank}")
-        
-        suit2_lower = suit2.lower()
-        player_cards.append(f"{suit2_lower}{rank2}")
-        
-        # Add community cards if both suit and rank are set
-        for i in range(5):
-            if river_suits[i] is not None and river_ranks[i] is not None:
-                suit_lower = river_suits[i].lower()
-                community_cards.append(f"{suit_lower}{river_ranks[i]}")
-        
-        # Calculate win probability against 3 opponents
-        win_prob = poker_calc.calculate_win_probability(
-            player_cards, community_cards, num_opponents=3, simulations=10
-        )
-        percentage_text = f"{win_prob:.0%}"
-        percentage_area.text = percentage_text
+        player_cards, community_cards = current_cards()
+        if community_cards == speculative_board:
+            # Already (being) calculated while the card was under the cursor
+            equity_task = speculative_task
+            if speculative_estimate is not None:
+                percentage_label.set(text=f"{speculative_estimate:.0%}")
+        elif offload_client is not None:
+            start_offload(player_cards, community_cards)
+        else:
+            equity_task = start_equity(player_cards, community_cards)
+    speculate(None)
+
+def start_offload(player_cards, community_cards):
+    """Send the calculation to the host, keeping the cards for a local fallback"""
+    global offload_pending, offload_query, offload_deadline_ns, equity_task
+    if not offload_client.query(player_cards, community_cards, NUM_OPPONENTS, OPPONENT_RANGE):
+        # Too long to send (a long OPPONENT_RANGE): calculate locally
+        equity_task = start_equity(player_cards, community_cards)
+        return
+    offload_pending = offload_query = (player_cards, community_cards)
+    offload_deadline_ns = time.monotonic_ns() + OFFLOAD_DEADLINE_MS * 1000000
+
+def step_offload():
+    """Show the host's latest estimate, or fall back to the local engine at the deadline"""
+    global offload_pending, equity_task, host_answering
+    update = offload_client.poll()
+    if update is not None:
+        host_answering = True
+        offload_pending = None
+        percentage_label.set(text=f"{update[0]:.0%}")
+        estimate, stderr, samples, final = update
+        if final and OPPONENT_RANGE is None:
+            # Keep the host's answer: exact ones come with no error
+            player_cards, community_cards = offload_query
+            precision = samples
+            if stderr == 0 and samples:
+                import pokerlib
+                precision = pokerlib.EXACT_PRECISION
+            get_poker_calc().store_result(player_cards, community_cards, NUM_OPPONENTS, estimate, precision)
+    elif offload_pending is not None and time.monotonic_ns() >= offload_deadline_ns:
+        host_answering = False
+        offload_client.cancel()
+        equity_task = start_equity(*offload_pending)
+        offload_pending = None
+
+def speculate(candidate):
+    """Calculate ahead for candidate (an integer card) added to the board, or stop when None"""
+    global speculative_board, speculative_task, speculative_estimate
+    if candidate is None:
+        speculative_board = speculative_task = speculative_estimate = None
+        return
+    player_cards, community_cards = current_cards()
+    community_cards.append(candidate)
+    if community_cards != speculative_board:
+        speculative_board = community_cards
+        speculative_task = start_equity(player_cards, community_cards)
+        speculative_estimate = None
+
+def step_speculation():
+    """Advance the speculative calculation for one time slice"""
+    global speculative_board, speculative_task, speculative_estimate
+    try:
+        estimate, samples_done, running = run_equity_slice(speculative_task)
+    except ValueError:
+        # OPPONENT_RANGE can't be dealt around these cards; picking the card
+        # starts a normal calculation, which reports it
+        speculative_board = speculative_task = speculative_estimate = None
+        return
+    if estimate is not None:
+        speculative_estimate = estimate
+    if not running:
+        speculative_task = None
+
+def step_win_percentage():
+    """Advance the running calculation for one time slice and show the estimate"""
+    global equity_task, equity_samples
+    if equity_task is None:
+        return
+    try:
+        estimate, samples_done, running = run_equity_slice(equity_task)
+    except ValueError as error:
+        # OPPONENT_RANGE can't be dealt around these cards
+        equity_task = None
+        percentage_label.set(text="--")
+        print("Equity:", error)
+        return
+    if estimate is not None:
+        equity_samples = samples_done
+        percentage_label.set(text=f"{estimate:.0%}")
+    if not running:
+        equity_task = None
+        # 0 trials means the answer came from a cache
+        print(f"Equity: {percentage_label.text} after {equity_samples} trials")
 
 # Create suit and rank selection areas
 suit_group = displayio.Group(scale=1, x=40, y=120)
@@ -143,57 +353,17 @@ for i in range(5):
         'rank': river_rank_area
     })
 
-# Flashing function
-def make_text_flash(label, flash_interval=0.5, visible_color=0xFFFF00, invisible_color=0x000000):
-    """
-    Make a text label flash
-    
-    Args:
-        label: The label to flash
-        flash_interval: Time between flashes in seconds
-        visible_color: Color when visible
-        invisible_color: Color when invisible
-    """
-    flash_time = time.monotonic()
-    flash_visible = True
-    
-    def update_flash():
-        nonlocal flash_time, flash_visible
-        current_time = time.monotonic()
-        
-        if current_time - flash_time >= flash_interval:
-            flash_visible = not flash_visible
-            flash_time = current_time
-            label.color = visible_color if flash_visible else invisible_color
-    
-    return update_flash
-
-flash_interval = 0.2
+# Screen labels for each card, indexed like the selection state below
+hand_suit_labels = [ScreenLabel(suit_area), ScreenLabel(suit2_area)]
+hand_rank_labels = [ScreenLabel(rank_area), ScreenLabel(rank2_area)]
+river_suit_labels = [ScreenLabel(card['suit']) for card in river_cards]
+river_rank_labels = [ScreenLabel(card['rank']) for card in river_cards]
 
-# Create flashing functions for suit and rank
-update_suit_flash = make_text_flash(suit_area, flash_interval=flash_interval)
-update_rank_flash = make_text_flash(rank_area, flash_interval=flash_interval)
-update_suit2_flash = make_text_flash(suit2_area, flash_interval=flash_interval)
-update_rank2_flash = make_text_flash(rank2_area, flash_interval=flash_interval)
-
-
-# Create flashing functions for river cards
-river_suit_flashes = []
-river_rank_flashes = []
-for i in range(5):
-    river_suit_flashes.append(
-        make_text_flash(river_cards[i]['suit'], 
-                        flash_interval=flash_interval, 
-                        visible_color=0xFFFFFF,
-                        invisible_color=0x000000)
-                    )
-    river_rank_flashes.append(
-        make_text_flash(river_cards[i]['rank'], 
-                        flash_interval=flash_interval, 
-                        visible_color=0xFFFFFF,
-                        invisible_color=0x000000)
-                    )
+# The label being selected flashes between its color and black
+FLASH_INTERVAL_NS = 200000000  # 0.2s
+FLASH_OFF_COLOR = 0x000000
 
+# Selected suit and rank indexes (see cards.py)
 suit = None
 rank = None
 suit2 = None
@@ -203,36 +373,14 @@ rank2 = None
 river_suits = [None] * 5
 river_ranks = [None] * 5
 
-# Track used cards to prevent duplicates
-used_cards = set()
-
-# Track what we were selecting last time to detect new selections
-last_selection = None
-last_card_index = None
+# Cards left to select, to prevent duplicates
+available = CardIndex()
 
 last_btn_state = True  # Track button state for debouncing
 
-def stop_other_flashing(current_card_index = None, current_selection = None):
-    """Stop all cards from flashing and set them to their normal colors"""
-    # Always set hand cards to yellow (unless they're currently being selected)
-    if not (current_selection == "suit" and current_card_index == 0):
-        suit_area.color = 0xFFFF00
-    if not (current_selection == "rank" and current_card_index == 0):
-        rank_area.color = 0xFFFF00
-    if not (current_selection == "suit" and current_card_index == 1):
-        suit2_area.color = 0xFFFF00
-    if not (current_selection == "rank" and current_card_index == 1):
-        rank2_area.color = 0xFFFF00
-
-    # Set river cards to white (unless they're currently being selected)
-    for i in range(5):
-        if i != current_card_index:
-            river_cards[i]['suit'].color = 0xFFFFFF
-            river_cards[i]['rank'].color = 0xFFFFFF
-
 def reset_all_cards():
-    """Reset all cards and used_cards set"""
-    global suit, rank, suit2, rank2, river_suits, river_ranks, used_cards
+    """Reset all cards and the available cards"""
+    global suit, rank, suit2, rank2, river_suits, river_ranks
     
     # Reset hand cards
     suit = None
@@ -244,21 +392,16 @@ def reset_all_cards():
     river_suits = [None] * 5
     river_ranks = [None] * 5
     
-    # Clear used cards
-    used_cards.clear()
+    # Make every card available again
+    available.reset()
     
     # Reset display text
-    suit_area.text = "_"
-    rank_area.text = "_"
-    suit2_area.text = "_"
-    rank2_area.text = "_"
-    
-    for i in range(5):
-        river_cards[i]['suit'].text = "_"
-        river_cards[i]['rank'].text = "_"
+    for screen_label in hand_suit_labels + hand_rank_labels + river_suit_labels + river_rank_labels:
+        screen_label.set(text="_")
     
     # Reset percentage
-    percentage_area.text = "0%"
+    calculate_win_percentage()
+    percentage_label.set(text="0%")
     
     print("All cards reset!")
 
@@ -291,78 +434,84 @@ def determine_current_selection():
                 break
     return current_selection, current_card_index
 
-while True:
-    # Determine what we're currently selecting
+def selection_label(current_selection, current_card_index):
+    """The screen label for a selection, or None once every card is set"""
+    if current_selection == "suit":
+        return hand_suit_labels[current_card_index]
+    if current_selection == "rank":
+        return hand_rank_labels[current_card_index]
+    if current_selection == "river_suit":
+        return river_suit_labels[current_card_index]
+    if current_selection == "river_rank":
+        return river_rank_labels[current_card_index]
+    return None
+
+def selection_value(position):
+    """The suit or rank index the encoder position selects for the current card"""
+    if current_selection == "suit" or current_selection == "river_suit":
+        return available.suit(position)
+    if current_selection == "rank":
+        return available.rank(position, suit if current_card_index == 0 else suit2)
+    return available.rank(position, river_suits[current_card_index])
+
+def selection_text(position):
+    """What the encoder position selects for the current card, as shown"""
+    if current_selection == "suit" or current_selection == "river_suit":
+        return SUITS[selection_value(position)]
+    return RANKS[selection_value(position)]
+
+cursor = None
+flash_visible = True
+next_flash_ns = 0
+
+def move_cursor(position):
+    """Point the flashing cursor at the next card to select"""
+    global current_selection, current_card_index, cursor, flash_visible, next_flash_ns
+    if cursor is not None:
+        cursor.set(color=cursor.normal_color)
     current_selection, current_card_index = determine_current_selection()
-    
-    # Update flashing based on what we're selecting
-    if current_selection == "suit" and current_card_index == 0:
-        update_suit_flash()
-        # Stop all others from flashing
-        stop_other_flashing(current_card_index, current_selection)
-
-    elif current_selection == "rank" and current_card_index == 0:
-        update_rank_flash()
-        # Stop all others from flashing
-        stop_other_flashing(current_card_index, current_selection)
-
-    elif current_selection == "suit" and current_card_index == 1:
-        update_suit2_flash()
-        # Stop all others from flashing
-        stop_other_flashing(current_card_index, current_selection)
-
-    elif current_selection == "rank" and current_card_index == 1:
-        update_rank2_flash()
-        # Stop all others from flashing
-        stop_other_flashing(current_card_index, current_selection)
-
-    elif current_selection == "river_suit":
-        river_suit_flashes[current_card_index]()
-        # Stop all others from flashing
-        stop_other_flashing(current_card_index)
-
-    elif current_selection == "river_rank":
-        river_rank_flashes[current_card_index]()
-        # Stop all others from flashing
-        stop_other_flashing(current_card_index)
-
+    cursor = selection_label(current_selection, current_card_index)
+    flash_visible = True
+    next_flash_ns = time.monotonic_ns() + FLASH_INTERVAL_NS
+    if cursor is not None:
+        cursor.set(text=selection_text(position))
+    update_speculation(position)
+
+def update_speculation(position):
+    """Calculate ahead for the flop, turn or river card under the cursor"""
+    # An answering host is fast enough not to need it
+    if host_answering:
+        speculate(None)
+    elif current_selection == "river_rank" and current_card_index >= 2:
+        speculate(selection_value(position) * 4 + river_suits[current_card_index])
     else:
-        stop_other_flashing()
+        speculate(None)
+
+# Throughput calibration, stepped in idle time once the engine is loaded
+calibration = None
 
+last_position = encoder.position
+move_cursor(last_position)
+flush_screen()
+
+boot_ms = (time.monotonic_ns() - BOOT_START_NS) // 1000000
+print(f"Boot: {boot_ms}ms to first input (budget {BOOT_BUDGET_MS}ms)")
+if boot_ms > BOOT_BUDGET_MS:
+    print("Boot over budget")
+
+while True:
+    # The display only changes on encoder and button events and flash edges
     position = encoder.position
+    if position != last_position:
+        if cursor is not None:
+            cursor.set(text=selection_text(position))
+            update_speculation(position)
+        last_position = position
     
-    if (current_selection != last_selection or current_card_index != last_card_index) and current_selection is not None:
-        if current_selection == "suit" and current_card_index == 0:
-            suit_area.text = select_suit(position, used_cards)
-        elif current_selection == "rank" and current_card_index == 0:
-            rank_area.text = select_rank(position, suit, used_cards)
-        elif current_selection == "suit" and current_card_index == 1:
-            suit2_area.text = select_suit(position, used_cards)
-        elif current_selection == "rank" and current_card_index == 1:
-            rank2_area.text = select_rank(position, suit2, used_cards)
-        elif current_selection == "river_suit":
-            river_cards[current_card_index]['suit'].text = select_suit(position, used_cards)
-        elif current_selection == "river_rank":
-            river_cards[current_card_index]['rank'].text = select_rank(position, river_suits[current_card_index], used_cards)
-    
-    if last_position is None or position != last_position:
-        if current_selection == "suit" and current_card_index == 0:
-            suit_area.text = select_suit(position, used_cards)
-        elif current_selection == "rank" and current_card_index == 0:
-            rank_area.text = select_rank(position, suit, used_cards)
-        elif current_selection == "suit" and current_card_index == 1:
-            suit2_area.text = select_suit(position, used_cards)
-        elif current_selection == "rank" and current_card_index == 1:
-            rank2_area.text = select_rank(position, suit2, used_cards)
-        elif current_selection == "river_suit":
-            river_cards[current_card_index]['suit'].text = select_suit(position, used_cards)
-        elif current_selection == "river_rank":
-            river_cards[current_card_index]['rank'].text = select_rank(position, river_suits[current_card_index], used_cards)
-    last_position = position
-    
-    # Update tracking variables
-    last_selection = current_selection
-    last_card_index = current_card_index
+    if cursor is not None and time.monotonic_ns() >= next_flash_ns:
+        flash_visible = not flash_visible
+        next_flash_ns = time.monotonic_ns() + FLASH_INTERVAL_NS
+        cursor.set(color=cursor.normal_color if flash_visible else FLASH_OFF_COLOR)
     
     # Button handling with debouncing
     current_btn_state = btn.value
@@ -371,30 +520,54 @@ while True:
         if current_selection is None:
             reset_all_cards()
         elif current_selection == "suit" and current_card_index == 0:
-            suit = select_suit(position, used_cards)
-            print(f"Card 1 suit set to: {suit}")
+            suit = available.suit(position)
+            print(f"Card 1 suit set to: {SUITS[suit]}")
         elif current_selection == "rank" and current_card_index == 0:
-            rank = select_rank(position, suit, used_cards)
-            used_cards.add((suit, rank))
-            print(f"Card 1 rank set to: {rank}")
+            rank = available.rank(position, suit)
+            available.use(rank * 4 + suit)
+            print(f"Card 1 rank set to: {RANKS[rank]}")
         elif current_selection == "suit" and current_card_index == 1:
-            suit2 = select_suit(position, used_cards)
-            print(f"Card 2 suit set to: {suit2}")
+            suit2 = available.suit(position)
+            print(f"Card 2 suit set to: {SUITS[suit2]}")
         elif current_selection == "rank" and current_card_index == 1:
-            rank2 = select_rank(position, suit2, used_cards)
-            used_cards.add((suit2, rank2))
-            print(f"Card 2 rank set to: {rank2}")
+            rank2 = available.rank(position, suit2)
+            available.use(rank2 * 4 + suit2)
+            print(f"Card 2 rank set to: {RANKS[rank2]}")
             calculate_win_percentage()
         elif current_selection == "river_suit":
-            river_suits[current_card_index] = select_suit(position, used_cards)
-            print(f"River card {current_card_index + 1} suit set to: {river_suits[current_card_index]}")
+            river_suits[current_card_index] = available.suit(position)
+            print(f"River card {current_card_index + 1} suit set to: {SUITS[river_suits[current_card_index]]}")
         elif current_selection == "river_rank":
-            river_ranks[current_card_index] = select_rank(position, river_suits[current_card_index], used_cards)
-            used_cards.add((river_suits[current_card_index], river_ranks[current_card_index]))
-            print(f"River card {current_card_index + 1} rank set to: {river_ranks[current_card_index]}")
+            river_ranks[current_card_index] = available.rank(position, river_suits[current_card_index])
+            available.use(river_ranks[current_card_index] * 4 + river_suits[current_card_index])
+            print(f"River card {current_card_index + 1} rank set to: {RANKS[river_ranks[current_card_index]]}")
             # Only calculate after flop (3 cards), turn (4th card), and river (5th card)
             if current_card_index >= 2: 
                 calculate_win_percentage()
+        move_cursor(position)
     last_btn_state = current_btn_state
     
-    sleep(0.0010)  # 10ms delay
\ No newline at end of file
+    if dirty_labels:
+        flush_screen()
+    
+    if offload_client is not None and offload_client.active:
+        step_offload()
+    
+    # Give the equity calculation a time slice, then any speculative one,
+    # or idle if there is none
+    if equity_task is not None:
+        step_win_percentage()
+    elif speculative_task is not None:
+        step_speculation()
+    elif poker_calc is None and suit is not None:
+        get_poker_calc()
+        calibration = poker_calc.throughput.calibrate(poker_calc, (NUM_OPPONENTS,),
+                                                      step_ns=EQUITY_SLICE_NS)
+    elif calibration is not None:
+        # One batch per pass, so input stays responsive
+        try:
+            next(calibration)
+        except StopIteration:
+            calibration = None
+    else:
+        sleep(0.0010)  # 1ms delay
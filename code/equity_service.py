@@ -0,0 +1,532 @@
+"""
+Local equity service for tooling and table-side devices (desktop only).
+Speaks JSON lines over stdin/stdout, a TCP port or a Unix socket:
+
+    python equity_service.py                      # stdin/stdout
+    python equity_service.py --port 7777          # TCP on 127.0.0.1
+    python equity_service.py --unix /tmp/equity   # Unix socket
+    python equity_service.py --load               # local load test: throughput and p99
+
+Each request is one JSON object per line:
+
+    {"id": 1, "hole": ["hA", "dA"], "board": ["h7", "d8", "c9"], "opponents": 3,
+     "range": "22+,A2s+", "simulations": 200000, "target_width": 0.01, "deadline_ms": 500}
+
+Only id and hole are required. Answers stream back as they refine:
+
+    {"id": 1, "estimate": 0.4312, "stderr": 0.0021, "samples": 40000, "final": false}
+
+and every request ends with one line that has "final": true (plus "exact",
+"deadline" or "cached" when they apply) or an "error". {"cancel": 1} drops
+request 1.
+
+Queries in flight for the same situation, including suit permutations of
+it, share one computation; its work units (UNIT_TRIALS trials each) run on
+a process pool with at most two units per worker queued or running. When
+MAX_COMPUTATIONS are running, new situations get {"error": "busy"} and each
+connection reads no further requests while MAX_CONNECTION_REQUESTS of its
+own are open.
+"""
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pokerlib
+
+UNIT_TRIALS = 20000
+SIMULATIONS = 200000
+DEADLINE_MS = 2000
+# Work units in flight per computation, so a lone query still spreads over workers
+UNITS_PER_QUERY = 4
+MAX_COMPUTATIONS = 64
+MAX_CONNECTION_REQUESTS = 32
+CACHE_SIZE = 4096
+
+_calculator = None
+
+
+def _worker_calculator():
+    global _calculator
+    if _calculator is None:
+        _calculator = pokerlib.PokerCalculator(cache_size=0)
+    return _calculator
+
+
+def _warm_up():
+    """Load the engine in a new worker"""
+    _worker_calculator()
+
+
+def _run_direct(job):
+    """Preflop table or exact enumeration in a worker: (win probability or None, combinations)"""
+    player, board, num_opponents = job
+    calc = _worker_calculator()
+    combinations = calc.count_combinations(len(player) + len(board), len(board), num_opponents)
+    return calc.direct_win_probability(player, board, num_opponents), combinations
+
+
+def _run_unit(job):
+    """Wins out of trials for one Monte Carlo work unit"""
+    player, board, num_opponents, opponent_range, trials = job
+    calc = _worker_calculator()
+    compiled = None
+    if opponent_range is not None:
+        compiled = calc.compile_ranges(opponent_range, num_opponents)
+    return calc.simulate(player, board, num_opponents, trials, compiled)
+
+
+def binomial_stderr(estimate, samples):
+    if not samples:
+        return 0.0
+    return math.sqrt(max(estimate * (1 - estimate), 0.25 / (samples + 1)) / samples)
+
+
+def _number(request, name, default, kind):
+    """request[name] as kind (int or float), positive, or ValueError"""
+    value = request.get(name, default)
+    if value is None:
+        return None
+    try:
+        if isinstance(value, (bool, str)):
+            raise TypeError
+        value = kind(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError('%s must be a number' % name)
+    if not value > 0:
+        raise ValueError('%s must be positive' % name)
+    return value
+
+
+def parse_request(request):
+    """
+    (player, board, num_opponents, opponent_range, simulations, target_width,
+    deadline_ms) from a request, or ValueError
+    """
+    if not isinstance(request.get('hole'), list) or len(request['hole']) != 2:
+        raise ValueError('hole must be a list of 2 cards')
+    board_cards = request.get('board', [])
+    if not isinstance(board_cards, list) or len(board_cards) not in (0, 3, 4, 5):
+        raise ValueError('board must be a list of 0, 3, 4 or 5 cards')
+    try:
+        player = pokerlib.cards_to_ints(request['hole'])
+        board = pokerlib.cards_to_ints(board_cards)
+    except (KeyError, TypeError):
+        raise ValueError('unknown card')
+    if len(set(player + board)) != len(player) + len(board):
+        raise ValueError('duplicate card')
+    num_opponents = request.get('opponents', 1)
+    if not isinstance(num_opponents, int) or not 1 <= num_opponents <= (52 - 2 - 5) // 2:
+        raise ValueError('opponents must be between 1 and %d' % ((52 - 2 - 5) // 2))
+    opponent_range = request.get('range')
+    if opponent_range is not None and not isinstance(opponent_range, str):
+        raise ValueError('range must be a string')
+    simulations = _number(request, 'simulations', SIMULATIONS, int)
+    target_width = _number(request, 'target_width', None, float)
+    deadline_ms = _number(request, 'deadline_ms', DEADLINE_MS, float)
+    return player, board, num_opponents, opponent_range, simulations, target_width, deadline_ms
+
+
+def response(request_id, update, **extra):
+    """An update as sent for one request, id first"""
+    message = {'id': request_id}
+    message.update(update)
+    message.update(extra)
+    return message
+
+
+class Computation:
+    """One running situation and the requests waiting on it"""
+    def __init__(self, key, player, board, num_opponents, opponent_range, simulations, target_width):
+        self.key = key
+        self.player = player
+        self.board = board
+        self.num_opponents = num_opponents
+        self.opponent_range = opponent_range
+        self.simulations = simulations
+        self.target_width = target_width
+        self.subscribers = []
+        self.wins = 0
+        self.samples = 0
+        self.latest = None
+
+    def publish(self, update):
+        self.latest = update
+        for queue in self.subscribers:
+            queue.put_nowait(update)
+
+    def wanted(self, submitted):
+        """Whether another work unit is worth starting"""
+        if not self.subscribers or submitted >= self.simulations:
+            return False
+        if self.target_width is not None and self.samples:
+            stderr = binomial_stderr(self.wins / self.samples, self.samples)
+            return 2 * 1.96 * stderr >= self.target_width
+        return True
+
+
+class EquityService:
+    """Coalesces queries by canonical situation and runs them on a process pool"""
+    def __init__(self, workers=None, unit_trials=UNIT_TRIALS, max_computations=MAX_COMPUTATIONS,
+                 units_per_query=UNITS_PER_QUERY, cache_size=CACHE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        # Workers forked from the service would inherit its open connections
+        # and keep them from closing, so they start from a clean process
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        for _ in range(self.workers):
+            self.pool.submit(_warm_up)
+        self.unit_trials = unit_trials
+        self.max_computations = max_computations
+        self.units_per_query = units_per_query
+        # Units waiting for or running on a worker, shared by all computations
+        self.slots = None
+        self.computations = {}
+        self.cache = pokerlib.EquityCache(cache_size)
+        self.calc = pokerlib.PokerCalculator(cache_size=0, backend=None)
+        self.connections = set()
+        self.coalesced = 0
+        self.computed = 0
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def key(self, player, board, num_opponents, opponent_range):
+        if opponent_range is None:
+            return pokerlib.canonical_key(player, board, num_opponents)
+        compiled = self.calc.compile_ranges(opponent_range, num_opponents)
+        return self.calc.range_key(player, board, compiled)
+
+    async def query(self, request):
+        """Async generator of the response dicts for one request"""
+        request_id = request.get('id')
+        try:
+            (player, board, num_opponents, opponent_range, simulations, target_width,
+             deadline_ms) = parse_request(request)
+            key = self.key(player, board, num_opponents, opponent_range)
+        except ValueError as e:
+            yield {'id': request_id, 'error': str(e)}
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + deadline_ms / 1000
+
+        cached = self.cache.get(key, simulations)
+        if cached is not None:
+            yield {'id': request_id, 'estimate': cached, 'stderr': 0.0, 'samples': 0, 'final': True,
+                   'cached': True}
+            return
+
+        computation = self.computations.get(key)
+        if computation is not None:
+            self.coalesced += 1
+            computation.simulations = max(computation.simulations, simulations)
+            if target_width is None or computation.target_width is None:
+                computation.target_width = None
+            else:
+                computation.target_width = min(computation.target_width, target_width)
+        elif len(self.computations) >= self.max_computations:
+            yield {'id': request_id, 'error': 'busy'}
+            return
+        else:
+            computation = Computation(key, player, board, num_opponents, opponent_range, simulations,
+                                      target_width)
+            self.computations[key] = computation
+            loop.create_task(self.run(computation))
+
+        queue = asyncio.Queue()
+        computation.subscribers.append(queue)
+        if computation.latest is not None:
+            queue.put_nowait(computation.latest)
+        latest = None
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                try:
+                    update = await asyncio.wait_for(queue.get(), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    if latest is None:
+                        yield {'id': request_id, 'error': 'deadline'}
+                    else:
+                        yield response(request_id, latest, final=True, deadline=True)
+                    return
+                latest = update
+                # A shared computation may run on for a stricter request
+                if not update['final'] and (update['samples'] >= simulations or target_width is not None
+                                            and 2 * 1.96 * update['stderr'] < target_width):
+                    yield response(request_id, update, final=True)
+                    return
+                yield response(request_id, update)
+                if update['final']:
+                    return
+        finally:
+            computation.subscribers.remove(queue)
+
+    async def run(self, computation):
+        loop = asyncio.get_running_loop()
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.workers * 2)
+        self.computed += 1
+        pending = set()
+        finished = set()
+        try:
+            if computation.opponent_range is None:
+                win_prob, combinations = await loop.run_in_executor(
+                    self.pool, _run_direct, (computation.player, computation.board, computation.num_opponents))
+                if win_prob is not None:
+                    exact = bool(computation.board)
+                    self.cache.put(computation.key, win_prob, pokerlib.EXACT_PRECISION)
+                    computation.publish({'estimate': win_prob, 'stderr': 0.0,
+                                         'samples': combinations if exact else 0, 'final': True,
+                                         'exact': exact})
+                    return
+
+            submitted = 0
+            while True:
+                # Start units while the query wants more and workers are free
+                while len(pending) < self.units_per_query and computation.wanted(submitted):
+                    if pending and self.slots.locked():
+                        break
+                    await self.slots.acquire()
+                    trials = min(self.unit_trials, computation.simulations - submitted)
+                    future = loop.run_in_executor(self.pool, _run_unit, (
+                        computation.player, computation.board, computation.num_opponents,
+                        computation.opponent_range, trials))
+                    future.trials = trials
+                    future.add_done_callback(lambda _: self.slots.release())
+                    pending.add(future)
+                    submitted += trials
+                if not pending:
+                    break
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    computation.wins += future.result()
+                    computation.samples += future.trials
+                estimate = computation.wins / computation.samples
+                final = not pending and not computation.wanted(submitted)
+                computation.publish({'estimate': estimate,
+                                     'stderr': binomial_stderr(estimate, computation.samples),
+                                     'samples': computation.samples, 'final': final})
+            if computation.samples:
+                self.cache.put(computation.key, computation.wins / computation.samples, computation.samples)
+        except Exception as e:
+            # Settle the other units, so their failures aren't logged as never retrieved
+            for future in finished | pending:
+                if not future.done():
+                    future.cancel()
+                elif not future.cancelled():
+                    future.exception()
+            for queue in computation.subscribers:
+                queue.put_nowait({'error': '%s: %s' % (type(e).__name__, e), 'final': True})
+        finally:
+            del self.computations[computation.key]
+
+    async def serve(self, reader, send):
+        """Answer the JSON lines from reader, writing response lines with await send(line)"""
+        limit = asyncio.Semaphore(MAX_CONNECTION_REQUESTS)
+        tasks = {}
+
+        async def answer(request):
+            try:
+                async for response in self.query(request):
+                    await send(json.dumps(response) + '\n')
+            finally:
+                limit.release()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError
+            except ValueError:
+                await send(json.dumps({'error': 'bad request'}) + '\n')
+                continue
+            if 'cancel' in request:
+                task = tasks.pop(request['cancel'], None)
+                if task is not None:
+                    task.cancel()
+                continue
+            await limit.acquire()
+            task = asyncio.ensure_future(answer(request))
+            tasks[request.get('id')] = task
+            task.add_done_callback(lambda done, request_id=request.get('id'):
+                                   tasks.pop(request_id, None) if tasks.get(request_id) is done else None)
+        if tasks:
+            await asyncio.wait(list(tasks.values()))
+
+    async def handle_connection(self, reader, writer):
+        async def send(line):
+            writer.write(line.encode())
+            await writer.drain()
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            await self.serve(reader, send)
+        finally:
+            writer.close()
+            self.connections.discard(task)
+
+
+async def serve_stdio(service):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    async def send(line):
+        sys.stdout.write(line)
+        sys.stdout.flush()
+    await service.serve(reader, send)
+
+
+# Situations for the load test; each query deals one with its suits permuted,
+# so isomorphic queries overlap in flight the way real traffic would
+LOAD_SITUATIONS = [
+    (['hA', 'dA'], ['h7', 'd8', 'c9'], 3),
+    (['hK', 'hQ'], ['h7', 'd8', 'h9', 's2'], 1),
+    (['s10', 'c10'], ['h7', 'd8', 'c9'], 2),
+    (['c5', 'c6'], ['h7', 'd8', 'c9', 's2'], 4),
+    (['sJ', 's10'], ['s2', 's7', 'dQ'], 2),
+    (['hA', 'hK'], ['h2', 'd8', 'cJ'], 6),
+    (['d4', 's4'], ['hA', 'dK', 'c4', 's9'], 3),
+    (['hQ', 'dJ'], [], 5),
+]
+
+
+def permute_suits(cards, rng):
+    """The same cards under a random relabelling of the suits"""
+    order = [0, 1, 2, 3]
+    for i in range(3, 0, -1):
+        j = rng.randrange(i + 1)
+        order[i], order[j] = order[j], order[i]
+    return [pokerlib.int_to_card(card - card % 4 + order[card % 4]) for card in pokerlib.cards_to_ints(cards)]
+
+
+async def load_test(clients=16, queries=400, workers=None, simulations=100000, deadline_ms=5000,
+                    cache_size=0):
+    """
+    Serve on a local Unix socket and replay queries from clients connections.
+    Returns a dict of throughput, latency percentiles and coalescing counts.
+    The result cache is off by default so every query reaches the pool or
+    coalesces with one in flight.
+    """
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), 'equity.sock')
+    service = EquityService(workers, cache_size=cache_size)
+    server = await asyncio.start_unix_server(service.handle_connection, path)
+    rng = pokerlib.XorShift(1)
+    jobs = []
+    for i in range(queries):
+        hole, board, num_opponents = LOAD_SITUATIONS[rng.randrange(len(LOAD_SITUATIONS))]
+        cards = permute_suits(hole + board, rng)
+        jobs.append({'id': i, 'hole': cards[:2], 'board': cards[2:], 'opponents': num_opponents,
+                     'simulations': simulations, 'deadline_ms': deadline_ms})
+    first_update = []
+    latencies = []
+    errors = []
+
+    async def client(share):
+        reader, writer = await asyncio.open_unix_connection(path)
+        for request in share:
+            start = time.perf_counter()
+            writer.write((json.dumps(request) + '\n').encode())
+            await writer.drain()
+            first = None
+            while True:
+                response = json.loads(await reader.readline())
+                if first is None:
+                    first = time.perf_counter() - start
+                if 'error' in response:
+                    errors.append(response['error'])
+                    break
+                if response['final']:
+                    latencies.append(time.perf_counter() - start)
+                    first_update.append(first)
+                    break
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(jobs[i::clients]) for i in range(clients)])
+    elapsed = time.perf_counter() - start
+    if service.connections:
+        await asyncio.wait(list(service.connections))
+    server.close()
+    await server.wait_closed()
+    service.close()
+    os.unlink(path)
+
+    def percentile(values, fraction):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(fraction * len(values)))] * 1000 if values else 0
+
+    return {
+        'queries': queries,
+        'clients': clients,
+        'workers': service.workers,
+        'queries_per_sec': queries / elapsed,
+        'p50_ms': percentile(latencies, 0.5),
+        'p99_ms': percentile(latencies, 0.99),
+        'first_update_p99_ms': percentile(first_update, 0.99),
+        'computations': service.computed,
+        'coalesced': service.coalesced,
+        'errors': len(errors),
+    }
+
+
+def main(argv):
+    port = None
+    unix_path = None
+    load = False
+    workers = None
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg == '--load':
+            load = True
+        elif arg in ('--port', '--unix', '--workers') and i + 1 < len(argv):
+            i += 1
+            if arg == '--port':
+                port = int(argv[i])
+            elif arg == '--unix':
+                unix_path = argv[i]
+            else:
+                workers = int(argv[i])
+        else:
+            print('usage: equity_service.py [--port PORT | --unix PATH | --load] [--workers N]',
+                  file=sys.stderr)
+            return 2
+        i += 1
+
+    if load:
+        result = asyncio.run(load_test(workers=workers))
+        for name in result:
+            print('%-22s %10.1f' % (name, result[name]))
+        return 0 if not result['errors'] else 1
+
+    async def run():
+        service = EquityService(workers)
+        try:
+            if port is None and unix_path is None:
+                await serve_stdio(service)
+                return
+            if port is not None:
+                server = await asyncio.start_server(service.handle_connection, '127.0.0.1', port)
+            else:
+                server = await asyncio.start_unix_server(service.handle_connection, unix_path)
+            async with server:
+                await server.serve_forever()
+        finally:
+            service.close()
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
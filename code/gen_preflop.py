@@ -0,0 +1,54 @@
+"""
+Offline generator for preflop_table.py, the embedded preflop equity table
+used by PokerCalculator when no community cards are known.
+
+    python gen_preflop.py [samples_per_entry] [output_path]
+
+Each of the 169 starting hands is simulated against 1-9 opponents with
+pokerlib's Monte Carlo engine. Uses every core available.
+"""
+import sys
+from multiprocessing import Pool
+
+import pokerlib
+
+DEFAULT_SAMPLES = 2000000
+MAX_OPPONENTS = pokerlib.PREFLOP_MAX_OPPONENTS
+
+
+def _entry(args):
+    hand_index, num_opponents, samples = args
+    calc = pokerlib.PokerCalculator(preflop=False)
+    hole = pokerlib.preflop_example(hand_index)
+    return calc.calculate_win_probability(hole, [], num_opponents, samples, exact=False)
+
+
+def build_table(samples):
+    jobs = [(h, k, samples) for h in range(169) for k in range(1, MAX_OPPONENTS + 1)]
+    with Pool() as pool:
+        return pool.map(_entry, jobs, chunksize=1)
+
+
+def write_module(path, equities, samples):
+    data = bytearray()
+    for equity in equities:
+        value = int(round(equity * 65535))
+        data.append(value & 0xFF)
+        data.append(value >> 8)
+    with open(path, 'w') as f:
+        f.write('# Generated by gen_preflop.py - do not edit.\n')
+        f.write(f'# Win probability for the 169 starting hands x 1-{MAX_OPPONENTS} opponents,\n')
+        f.write(f'# {samples} samples per entry, stored as little-endian u16 (x / 65535).\n')
+        f.write('# Entry (hand_index * %d + num_opponents - 1); see pokerlib.preflop_index.\n' % MAX_OPPONENTS)
+        f.write(f'SAMPLES = {samples}\n')
+        f.write('EQUITY = (\n')
+        for i in range(0, len(data), 32):
+            f.write(f'    {bytes(data[i:i + 32])!r}\n')
+        f.write(')\n')
+
+
+if __name__ == "__main__":
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SAMPLES
+    output = sys.argv[2] if len(sys.argv) > 2 else 'preflop_table.py'
+    write_module(output, build_table(samples), samples)
+    print(f"Wrote {output}")
@@ -0,0 +1,85 @@
+"""
+Build-time generator for evaltables.bin, the lookup tables used by
+pokerlib.EvalTables. Run on a desktop and copy the output next to pokerlib.py:
+
+    python gen_tables.py [output_path]
+"""
+import sys
+
+import pokerlib
+
+
+def _non_flush_cards(rank_counts):
+    """Cards for a list of (rank, count) with suits spread so no suit has 5"""
+    cards = []
+    k = 0
+    for rank, count in rank_counts:
+        for _ in range(count):
+            cards.append(rank * 4 + (k & 3))
+            k += 1
+    return cards
+
+
+def _mask_ranks(mask):
+    return [r for r in range(13) if mask >> r & 1]
+
+
+def build_flush_table():
+    table = [0] * pokerlib.FLUSH_TABLE_SIZE
+    for mask in range(pokerlib.FLUSH_TABLE_SIZE):
+        ranks = _mask_ranks(mask)
+        if 5 <= len(ranks) <= 7:
+            table[mask] = pokerlib.evaluate_ints([r * 4 for r in ranks])
+    return table
+
+
+def build_unique_table():
+    table = [0] * pokerlib.UNIQUE_TABLE_SIZE
+    for mask in range(pokerlib.UNIQUE_TABLE_SIZE):
+        ranks = _mask_ranks(mask)
+        if 5 <= len(ranks) <= 7:
+            table[mask] = pokerlib.evaluate_ints(_non_flush_cards([(r, 1) for r in ranks]))
+    return table
+
+
+def _rank_multisets(rank, remaining, prefix):
+    """Yield every (rank, count) list using ranks <= rank that holds remaining cards"""
+    if rank < 0:
+        if remaining == 0:
+            yield prefix
+        return
+    for count in range(min(remaining, 4) + 1):
+        if count:
+            yield from _rank_multisets(rank - 1, remaining - count, prefix + [(rank, count)])
+        else:
+            yield from _rank_multisets(rank - 1, remaining, prefix)
+
+
+def build_paired_table():
+    size = pokerlib._build_multiset_offsets()
+    table = [0] * size
+    for multiset in _rank_multisets(12, 7, []):
+        packed = 0
+        for rank, count in multiset:
+            packed |= count << (rank * 4)
+        table[pokerlib.multiset_index(packed)] = pokerlib.evaluate_ints(_non_flush_cards(multiset))
+    return table
+
+
+def write_tables(path):
+    flush = build_flush_table()
+    unique = build_unique_table()
+    paired = build_paired_table()
+    with open(path, 'wb') as f:
+        f.write(pokerlib.TABLES_MAGIC)
+        for value in (pokerlib.TABLES_VERSION, len(paired), 0):
+            f.write(value.to_bytes(4, 'little'))
+        for table in (flush, unique, paired):
+            f.write(b''.join(value.to_bytes(4, 'little') for value in table))
+    return pokerlib.TABLES_HEADER_SIZE + 4 * (len(flush) + len(unique) + len(paired))
+
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else pokerlib._default_tables_path()
+    size = write_tables(output)
+    print(f"Wrote {output} ({size} bytes)")
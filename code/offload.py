@@ -0,0 +1,156 @@
+"""
+Binary protocol for offloading equity queries from the device to a host
+running offload_host.py, over the USB CDC data port (see boot.py) or any
+byte stream with non-blocking read(n) and write(data).
+
+Every frame is
+    0xA5, type, payload length, payload, checksum
+where checksum is the low byte of type + length + the payload bytes, and
+the length (one byte) caps payloads at MAX_PAYLOAD. Cards
+are pokerlib integer cards, one byte each. Messages:
+    QUERY  'Q'  id, opponents, hole count, board count, cards..., range text
+    UPDATE 'U'  id, flags, estimate (u16, /65535), stderr (u16, /65535), samples (u32)
+    CANCEL 'C'  id
+A new QUERY replaces the running one. UPDATE flags: 1 = final, 2 = exact.
+"""
+import struct
+
+SYNC = 0xA5
+QUERY = 0x51
+UPDATE = 0x55
+CANCEL = 0x43
+
+FINAL = 1
+EXACT = 2
+
+MAX_PAYLOAD = 255
+
+_UPDATE_FORMAT = '<BBHHI'
+_UPDATE_SIZE = struct.calcsize(_UPDATE_FORMAT)
+_SCALE = 65535
+
+
+def encode_frame(kind, payload):
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError('payload too long for a frame')
+    checksum = kind + len(payload)
+    for byte in payload:
+        checksum += byte
+    return bytes([SYNC, kind, len(payload)]) + bytes(payload) + bytes([checksum & 0xFF])
+
+
+def encode_query(query_id, player, board, num_opponents, opponent_range=None):
+    """A QUERY frame; ValueError when the cards and range don't fit in one"""
+    text = opponent_range.encode() if opponent_range else b''
+    if 4 + len(player) + len(board) + len(text) > MAX_PAYLOAD:
+        raise ValueError('query too long for a frame')
+    payload = bytearray([query_id, num_opponents, len(player), len(board)])
+    payload.extend(bytes(player))
+    payload.extend(bytes(board))
+    payload.extend(text)
+    return encode_frame(QUERY, payload)
+
+
+def decode_query(payload):
+    """(id, player, board, num_opponents, opponent range text or None)"""
+    query_id, num_opponents, holes, boards = payload[0], payload[1], payload[2], payload[3]
+    player = list(payload[4:4 + holes])
+    board = list(payload[4 + holes:4 + holes + boards])
+    opponent_range = bytes(payload[4 + holes + boards:]).decode() or None
+    return query_id, player, board, num_opponents, opponent_range
+
+
+def encode_update(query_id, estimate, stderr, samples, flags=0):
+    payload = struct.pack(_UPDATE_FORMAT, query_id, flags, int(estimate * _SCALE + 0.5),
+                          int(min(stderr, 1.0) * _SCALE + 0.5), min(samples, 0xFFFFFFFF))
+    return encode_frame(UPDATE, payload)
+
+
+def decode_update(payload):
+    """(id, estimate, stderr, samples, flags)"""
+    query_id, flags, estimate, stderr, samples = struct.unpack(_UPDATE_FORMAT, bytes(payload))
+    return query_id, estimate / _SCALE, stderr / _SCALE, samples, flags
+
+
+class FrameReader:
+    """Reassembles frames from stream chunks, resyncing past corrupt bytes"""
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        if data:
+            self.buffer.extend(data)
+
+    def next_frame(self):
+        """The next complete (type, payload), or None until more bytes arrive"""
+        buffer = self.buffer
+        while buffer:
+            if buffer[0] != SYNC:
+                self.buffer = buffer = buffer[1:]
+                continue
+            if len(buffer) < 3:
+                return None
+            size = 3 + buffer[2] + 1
+            if len(buffer) < size:
+                return None
+            checksum = 0
+            for i in range(1, size - 1):
+                checksum += buffer[i]
+            if checksum & 0xFF != buffer[size - 1]:
+                # Not a real frame start; look for the next sync byte
+                self.buffer = buffer = buffer[1:]
+                continue
+            frame = buffer[1], buffer[3:size - 1]
+            self.buffer = buffer[size:]
+            return frame
+        return None
+
+
+class OffloadClient:
+    """Device side: sends queries and collects the host's updates for the latest one"""
+    def __init__(self, stream):
+        self.stream = stream
+        self.reader = FrameReader()
+        self.query_id = 0
+        self.active = False
+
+    def query(self, player, board, num_opponents, opponent_range=None):
+        """
+        Ask the host about integer cards; replaces any running query. False,
+        sending nothing, when the query is too long for a frame.
+        """
+        query_id = (self.query_id + 1) & 0xFF
+        try:
+            frame = encode_query(query_id, player, board, num_opponents, opponent_range)
+        except ValueError:
+            return False
+        self.query_id = query_id
+        self.active = True
+        self.stream.write(frame)
+        return True
+
+    def cancel(self):
+        if self.active:
+            self.active = False
+            self.stream.write(encode_frame(CANCEL, bytes([self.query_id])))
+
+    def poll(self):
+        """
+        Latest (estimate, stderr, samples, final) the host sent for the active
+        query since the last poll, or None
+        """
+        waiting = self.stream.in_waiting
+        if waiting:
+            self.reader.feed(self.stream.read(waiting))
+        latest = None
+        frame = self.reader.next_frame()
+        while frame is not None:
+            kind, payload = frame
+            if kind == UPDATE and len(payload) == _UPDATE_SIZE and self.active:
+                query_id, estimate, stderr, samples, flags = decode_update(payload)
+                if query_id == self.query_id:
+                    latest = estimate, stderr, samples, bool(flags & FINAL)
+                    if flags & FINAL:
+                        self.active = False
+            frame = self.reader.next_frame()
+        return latest
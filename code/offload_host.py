@@ -0,0 +1,190 @@
+"""
+Host companion for code.py's offload mode (desktop only). Answers the
+device's queries over the serial port with a full-strength PokerCalculator
+(the NumPy backend when available, exact enumeration when it's cheap) and
+streams progressive estimates back:
+
+    python offload_host.py /dev/ttyACM1      # the board's data port (COM port on Windows)
+    python offload_host.py --selftest        # round trip over a local pty pair
+
+Uses pyserial when installed, otherwise opens the port as a raw tty.
+"""
+import os
+import select
+import sys
+import time
+
+import offload
+import pokerlib
+
+BATCH_SIZE = 50000
+MAX_SIMULATIONS = 2000000
+# Stop early once the 95% interval is this narrow
+TARGET_WIDTH = 0.002
+
+
+class FdStream:
+    """Non-blocking serial-like stream over a file descriptor"""
+    def __init__(self, fd):
+        self.fd = fd
+        os.set_blocking(fd, False)
+
+    @property
+    def in_waiting(self):
+        return 1 << 16 if select.select([self.fd], [], [], 0)[0] else 0
+
+    def read(self, size):
+        try:
+            return os.read(self.fd, size)
+        except BlockingIOError:
+            return b''
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(self.fd, view):]
+            except BlockingIOError:
+                select.select([], [self.fd], [])
+
+    def wait(self, timeout):
+        select.select([self.fd], [], [], timeout)
+
+
+def open_stream(path):
+    try:
+        import serial
+    except ImportError:
+        import tty
+        fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        tty.setraw(fd)
+        return FdStream(fd)
+    return serial.Serial(path, timeout=0)
+
+
+class OffloadServer:
+    """Runs one query at a time, checking for new ones between batches"""
+    def __init__(self, stream, calc=None, batch_size=BATCH_SIZE, max_simulations=MAX_SIMULATIONS,
+                 target_width=TARGET_WIDTH):
+        self.stream = stream
+        self.calc = calc if calc is not None else pokerlib.PokerCalculator()
+        self.batch_size = batch_size
+        self.max_simulations = max_simulations
+        self.target_width = target_width
+        self.reader = offload.FrameReader()
+        self.query_id = None
+        self.task = None
+
+    def read_frames(self):
+        waiting = self.stream.in_waiting
+        if waiting:
+            self.reader.feed(self.stream.read(waiting))
+        frame = self.reader.next_frame()
+        while frame is not None:
+            kind, payload = frame
+            if kind == offload.QUERY and len(payload) >= 4:
+                self.start(*offload.decode_query(payload))
+            elif kind == offload.CANCEL and payload and payload[0] == self.query_id:
+                self.task = None
+            frame = self.reader.next_frame()
+
+    def start(self, query_id, player, board, num_opponents, opponent_range):
+        self.query_id = query_id
+        self.task = self.calc.iter_int_win_probability(
+            player, board, num_opponents, batch_size=self.batch_size,
+            max_simulations=self.max_simulations, target_width=self.target_width,
+            opponent_ranges=opponent_range)
+
+    def step(self):
+        """Read new queries, then run one batch of the current one; False when idle"""
+        self.read_frames()
+        if self.task is None:
+            return False
+        try:
+            estimate, stderr, samples = next(self.task)
+        except StopIteration:
+            self.task = None
+            return False
+        except ValueError as error:
+            # The range can't be dealt around these cards: send nothing, so
+            # the device runs the query itself and reports the error
+            print('query %d: %s' % (self.query_id, error))
+            self.task = None
+            return False
+        final = stderr == 0
+        flags = offload.FINAL if final else 0
+        if final and samples:
+            flags |= offload.EXACT
+        self.stream.write(offload.encode_update(self.query_id, estimate, stderr, samples, flags))
+        # A run that hit its limit ends on its last update
+        if not final and (samples >= self.max_simulations or 2 * 1.96 * stderr < self.target_width):
+            self.stream.write(offload.encode_update(self.query_id, estimate, stderr, samples, offload.FINAL))
+            self.task = None
+        elif final:
+            self.task = None
+        return True
+
+    def serve_forever(self):
+        while True:
+            if not self.step():
+                if hasattr(self.stream, 'wait'):
+                    self.stream.wait(0.05)
+                else:
+                    time.sleep(0.005)
+
+
+def selftest():
+    """Query a server over a pty pair, as the device would, and check the answers"""
+    import threading
+    master, slave = os.openpty()
+    import tty
+    tty.setraw(slave)
+    server = OffloadServer(FdStream(master), batch_size=20000, max_simulations=200000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    device = FdStream(slave)
+    client = offload.OffloadClient(device)
+    # Range answers are checked against exact values from enumerating every
+    # combo in the range and every runout, not against the engine itself.
+    # None means the local answer against random hands (exact on the turn),
+    # which a '100%' range must match too.
+    checks = [
+        (['hA', 'dA'], ['h7', 'd8', 'c9'], 3, None, None),
+        (['hK', 'hQ'], ['h7', 'd8', 'h9', 's2'], 1, None, None),
+        (['hK', 'hQ'], ['h7', 'd8', 'h9', 's2'], 1, '22+,A2s+,KTo+', 0.3956),
+        (['s10', 'c10'], ['h7', 'd8', 'c9', 's2'], 1, '22+,A2s+,KTo+', 0.7136),
+        (['s10', 'c10'], ['h7', 'd8', 'c9', 's2'], 1, '100%', None),
+    ]
+    reference = pokerlib.PokerCalculator(backend=None)
+    for hole, board, num_opponents, opponent_range, expected in checks:
+        client.query(pokerlib.cards_to_ints(hole), pokerlib.cards_to_ints(board), num_opponents,
+                     opponent_range)
+        updates = 0
+        result = None
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            device.wait(0.1)
+            update = client.poll()
+            if update is not None:
+                updates += 1
+                result = update
+                if update[3]:
+                    break
+        if expected is None:
+            expected = reference.calculate_win_probability(hole, board, num_opponents, 20000)
+        print('%s | %s vs %d%s: host %.4f (+/- %.4f, %d samples, %d updates), expected %.4f'
+              % (' '.join(hole), ' '.join(board), num_opponents,
+                 ' on ' + opponent_range if opponent_range else '', result[0], result[1],
+                 result[2], updates, expected))
+        assert result[3] and abs(result[0] - expected) < 0.02
+    print('selftest passed')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 2 and sys.argv[1] == '--selftest':
+        selftest()
+    elif len(sys.argv) == 2:
+        OffloadServer(open_stream(sys.argv[1])).serve_forever()
+    else:
+        print('usage: offload_host.py PORT | --selftest')
+        sys.exit(2)
@@ -1,37 +1,1314 @@
+import math
+import os
 import random
+import time
+from collections import OrderedDict
 
-class PokerCalculator:
-    def __init__(self):
-        # Card ranks and suits
-        self.ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        self.suits = ['h', 'd', 'c', 's']  # hearts, diamonds, clubs, spades
-        
-        # Hand rankings (higher number = better hand)
-        self.hand_rankings = {
-            'high_card': 1,
-            'pair': 2,
-            'two_pair': 3,
-            'three_of_a_kind': 4,
-            'straight': 5,
-            'flush': 6,
-            'full_house': 7,
-            'four_of_a_kind': 8,
-            'straight_flush': 9,
-            'royal_flush': 10
+# Cards are small integers: card = rank_index * 4 + suit_index, where
+# rank_index follows RANKS (0 = '2' ... 12 = 'A') and suit_index follows SUITS.
+# The encoding lives in cards.py so the UI can build engine cards directly.
+from cards import RANKS, SUITS
+
+_RANK_INDEX = {}
+for _i, _r in enumerate(RANKS):
+    _RANK_INDEX[_r] = _i
+_SUIT_INDEX = {}
+for _i, _s in enumerate(SUITS):
+    _SUIT_INDEX[_s] = _i
+
+# Nanosecond clock for the profiler and time budgets (MicroPython's time
+# module has no monotonic_ns)
+_clock_ns = getattr(time, 'monotonic_ns', None) or time.time_ns
+
+# Hand categories, stored in bits 20+ of a strength value
+HIGH_CARD = 1
+PAIR = 2
+TWO_PAIR = 3
+THREE_OF_A_KIND = 4
+STRAIGHT = 5
+FLUSH = 6
+FULL_HOUSE = 7
+FOUR_OF_A_KIND = 8
+STRAIGHT_FLUSH = 9
+
+HAND_TYPES = ['invalid', 'high_card', 'pair', 'two_pair', 'three_of_a_kind', 'straight',
+              'flush', 'full_house', 'four_of_a_kind', 'straight_flush']
+
+# 13-bit rank mask lookups, built on first use:
+# _TOP_BIT[m] is the highest rank index in m,
+# _STRAIGHT_HIGH[m] is 1 + the high rank of the best straight in m (0 if none).
+_TOP_BIT = None
+_STRAIGHT_HIGH = None
+
+
+def _build_rank_tables():
+    global _TOP_BIT, _STRAIGHT_HIGH
+    top = bytearray(8192)
+    for m in range(2, 8192):
+        top[m] = top[m >> 1] + 1
+    straight = bytearray(8192)
+    for m in range(8192):
+        w = (m << 1) | (m >> 12)  # ace also plays low
+        s = w & (w >> 1) & (w >> 2) & (w >> 3) & (w >> 4)
+        if s:
+            straight[m] = top[s] + 4
+    _TOP_BIT = top
+    _STRAIGHT_HIGH = straight
+
+
+def card_to_int(card):
+    """Convert a card string like 'h10' or 'dA' to its integer encoding"""
+    return _RANK_INDEX[card[1:]] * 4 + _SUIT_INDEX[card[0]]
+
+
+def int_to_card(card):
+    """Convert an integer card back to its string form"""
+    return SUITS[card & 3] + RANKS[card >> 2]
+
+
+def cards_to_ints(cards):
+    return [card_to_int(card) for card in cards]
+
+
+def _kickers(mask, n, shift):
+    """Pack the n highest ranks of mask into 4-bit fields starting at shift"""
+    top = _TOP_BIT
+    value = 0
+    while n and mask:
+        r = top[mask]
+        value |= r << shift
+        mask ^= 1 << r
+        shift -= 4
+        n -= 1
+    return value
+
+
+# Per-suit rank masks, reused by every evaluation so scoring allocates nothing
+_SUIT_MASKS = [0, 0, 0, 0]
+
+
+def evaluate_ints(cards):
+    """
+    Score the best 5-card hand out of up to 7 integer cards in one pass.
+    Returns an ordinal strength (higher is better, equal means a tie):
+    category << 20 followed by up to five 4-bit rank fields for kickers.
+    """
+    if _TOP_BIT is None:
+        _build_rank_tables()
+    # m1..m4 hold the ranks seen at least 1..4 times, counts has one 4-bit
+    # card count per suit. Everything stays a small int so MicroPython
+    # doesn't allocate.
+    m1 = m2 = m3 = m4 = 0
+    counts = 0
+    suit_masks = _SUIT_MASKS
+    suit_masks[0] = suit_masks[1] = suit_masks[2] = suit_masks[3] = 0
+    for c in cards:
+        bit = 1 << (c >> 2)
+        s = c & 3
+        suit_masks[s] |= bit
+        counts += 1 << (s << 2)
+        if m1 & bit:
+            if m2 & bit:
+                if m3 & bit:
+                    m4 |= bit
+                else:
+                    m3 |= bit
+            else:
+                m2 |= bit
+        else:
+            m1 |= bit
+    return _strength(m1, m2, m3, m4, _flush_mask(counts, suit_masks))
+
+
+def _flush_mask(counts, suit_masks):
+    """Rank mask of the suit holding 5+ cards, or 0"""
+    flush = (counts + 0x3333) & 0x8888
+    if not flush:
+        return 0
+    if flush & 0x8:
+        return suit_masks[0]
+    if flush & 0x80:
+        return suit_masks[1]
+    if flush & 0x800:
+        return suit_masks[2]
+    return suit_masks[3]
+
+
+def _strength(m1, m2, m3, m4, flush):
+    top = _TOP_BIT
+
+    # With 7 cards a flush rules out quads and full houses
+    if flush:
+        high = _STRAIGHT_HIGH[flush]
+        if high:
+            return (STRAIGHT_FLUSH << 20) | ((high - 1) << 16)
+        return (FLUSH << 20) | _kickers(flush, 5, 16)
+
+    if m4:
+        q = top[m4]
+        return (FOUR_OF_A_KIND << 20) | (q << 16) | _kickers(m1 ^ (1 << q), 1, 12)
+
+    if m3:
+        t = top[m3]
+        rest = m2 ^ (1 << t)
+        if rest:
+            return (FULL_HOUSE << 20) | (t << 16) | (top[rest] << 12)
+
+    high = _STRAIGHT_HIGH[m1]
+    if high:
+        return (STRAIGHT << 20) | ((high - 1) << 16)
+
+    if m3:
+        return (THREE_OF_A_KIND << 20) | (t << 16) | _kickers(m1 ^ (1 << t), 2, 12)
+
+    if m2:
+        p = top[m2]
+        rest = m2 ^ (1 << p)
+        if rest:
+            p2 = top[rest]
+            return ((TWO_PAIR << 20) | (p << 16) | (p2 << 12) |
+                    _kickers(m1 ^ (1 << p) ^ (1 << p2), 1, 8))
+        return (PAIR << 20) | (p << 16) | _kickers(m1 ^ (1 << p), 3, 12)
+
+    return (HIGH_CARD << 20) | _kickers(m1, 5, 16)
+
+
+def summarize_board(cards, summary):
+    """
+    Fill summary (a list of 7) with what every hand on a board of up to 5
+    integer cards shares: the rank masks m1..m4 as in evaluate_ints, then
+    the only suit that can still make a flush with two more cards, its board
+    card count and its rank mask (a count of 0 when there is none).
+    Players' strengths then come from evaluate_hole.
+    """
+    if _TOP_BIT is None:
+        _build_rank_tables()
+    m1 = m2 = m3 = m4 = 0
+    counts = 0
+    suit_masks = _SUIT_MASKS
+    suit_masks[0] = suit_masks[1] = suit_masks[2] = suit_masks[3] = 0
+    for c in cards:
+        bit = 1 << (c >> 2)
+        s = c & 3
+        suit_masks[s] |= bit
+        counts += 1 << (s << 2)
+        if m1 & bit:
+            if m2 & bit:
+                if m3 & bit:
+                    m4 |= bit
+                else:
+                    m3 |= bit
+            else:
+                m2 |= bit
+        else:
+            m1 |= bit
+    summary[0] = m1
+    summary[1] = m2
+    summary[2] = m3
+    summary[3] = m4
+    summary[4] = summary[5] = summary[6] = 0
+    for s in range(4):
+        count = (counts >> (s << 2)) & 0xF
+        if count >= 3:
+            summary[4] = s
+            summary[5] = count
+            summary[6] = suit_masks[s]
+
+
+def evaluate_hole(summary, card1, card2, strength=_strength):
+    """
+    Strength (as evaluate_ints) of two hole cards on a board summarized by
+    summarize_board: only the two cards are folded in. strength scores the
+    resulting masks (EvalTables passes its table lookup).
+    """
+    m1, m2, m3, m4, flush_suit, flush_count, flush_mask = summary
+    bit = 1 << (card1 >> 2)
+    if m1 & bit:
+        if m2 & bit:
+            if m3 & bit:
+                m4 |= bit
+            else:
+                m3 |= bit
+        else:
+            m2 |= bit
+    else:
+        m1 |= bit
+    bit2 = 1 << (card2 >> 2)
+    if m1 & bit2:
+        if m2 & bit2:
+            if m3 & bit2:
+                m4 |= bit2
+            else:
+                m3 |= bit2
+        else:
+            m2 |= bit2
+    else:
+        m1 |= bit2
+    if flush_count:
+        if card1 & 3 == flush_suit:
+            flush_count += 1
+            flush_mask |= bit
+        if card2 & 3 == flush_suit:
+            flush_count += 1
+            flush_mask |= bit2
+        if flush_count < 5:
+            flush_mask = 0
+    return strength(m1, m2, m3, m4, flush_mask)
+
+
+def hand_type(strength):
+    """Name of the hand category for a strength returned by evaluate_ints"""
+    category = strength >> 20
+    if category == STRAIGHT_FLUSH and (strength >> 16) & 0xF == 12:
+        return 'royal_flush'
+    return HAND_TYPES[category]
+
+
+# Exact enumeration is used automatically when the number of (runout,
+# opponent holdings) combinations is at most this
+EXACT_THRESHOLD = 50000
+
+# Opponent holdings dealt per draw of reduced_draws: every card left once
+# the hero's two cards and the full board are out, whatever the street
+REDUCED_HANDS = (52 - 2 - 5) // 2
+
+# With a time budget and no batch_size, each Monte Carlo batch is sized to
+# take about this long, so progress shows without much per-batch overhead
+BUDGET_BATCH_NS = 2000000
+# Batches run by a backend instead take 1/BUDGET_BACKEND_SHARE of the budget
+# left: its per-call overhead would swamp BUDGET_BATCH_NS batches
+BUDGET_BACKEND_SHARE = 4
+
+
+def choose(n, r):
+    """Binomial coefficient (math.comb is not available on CircuitPython)"""
+    if r < 0 or r > n:
+        return 0
+    result = 1
+    for i in range(r):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def holding_sets(n, k):
+    """Number of ways to give k opponents disjoint 2-card hands from n cards, ignoring order"""
+    result = 1
+    for i in range(k):
+        result *= choose(n - 2 * i, 2)
+    for i in range(2, k + 1):
+        result //= i
+    return result
+
+
+def _count_disjoint(hands, start, k, used):
+    """Count k-sets of pairwise disjoint hands (as card bitmasks) from hands[start:]"""
+    if k == 1:
+        count = 0
+        for i in range(start, len(hands)):
+            if not hands[i] & used:
+                count += 1
+        return count
+    count = 0
+    for i in range(start, len(hands) - k + 1):
+        hand = hands[i]
+        if not hand & used:
+            count += _count_disjoint(hands, i + 1, k - 1, used | hand)
+    return count
+
+
+def canonical_cards(player, board):
+    """
+    Relabel suits so that situations differing only by a suit permutation map
+    to the same (hole, board) tuples of sorted integer cards
+    """
+    # Suits are ordered by their hole ranks, then their board ranks; suits with
+    # equal signatures are interchangeable, so ties don't matter
+    signature = [0, 0, 0, 0]
+    for card in player:
+        signature[card & 3] |= 1 << ((card >> 2) + 13)
+    for card in board:
+        signature[card & 3] |= 1 << (card >> 2)
+    order = sorted(range(4), key=lambda suit: -signature[suit])
+    relabel = [0, 0, 0, 0]
+    for new_suit, old_suit in enumerate(order):
+        relabel[old_suit] = new_suit
+    hole = tuple(sorted((card & ~3) | relabel[card & 3] for card in player))
+    community = tuple(sorted((card & ~3) | relabel[card & 3] for card in board))
+    return hole, community
+
+
+def canonical_key(player, board, num_opponents):
+    """Cache key for a situation, shared by all of its suit permutations"""
+    hole, community = canonical_cards(player, board)
+    return hole, community, num_opponents
+
+
+# Precision recorded for exact answers; Monte Carlo results record their sample count
+EXACT_PRECISION = 1 << 30
+
+
+class EquityCache:
+    """
+    Bounded LRU of win probabilities keyed by canonical_key. Each entry keeps
+    the precision it was computed with and only answers queries asking for
+    the same or less.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, precision=0):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._entries[key] = entry
+            if entry[1] >= precision:
+                self.hits += 1
+                return entry[0]
+        self.misses += 1
+        return None
+
+    def put(self, key, win_prob, precision):
+        old = self._entries.pop(key, None)
+        if old is not None and old[1] > precision:
+            win_prob, precision = old
+        self._entries[key] = (win_prob, precision)
+        if len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def clear(self):
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Hit counts and an estimate of the memory held by the entries"""
+        lookups = self.hits + self.misses
+        try:
+            from sys import getsizeof
+            size = getsizeof(self._entries)
+            for key, entry in self._entries.items():
+                size += getsizeof(key) + getsizeof(key[0]) + getsizeof(key[1]) + getsizeof(entry)
+        except ImportError:
+            # No getsizeof on CircuitPython: roughly 120 bytes per entry
+            size = 120 * len(self._entries)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'bytes': size,
         }
-    
-    def create_deck(self, exclude_cards=None):
-        """Create a deck excluding specified cards"""
-        if exclude_cards is None:
-            exclude_cards = []
+
+
+# Persistent equity cache file: a header, then fixed-size records appended in
+# order, later records replacing earlier ones with the same key
+CACHE_MAGIC = b'EQC1'
+CACHE_RECORD_SIZE = 16
+_NO_CARD = 0xFF
+
+
+def _fletcher16(data, end):
+    low = 0
+    high = 0
+    for i in range(end):
+        low = (low + data[i]) % 255
+        high = (high + low) % 255
+    return low | (high << 8)
+
+
+def _sync(f):
+    """Push a written file to storage before carrying on"""
+    f.flush()
+    try:
+        os.fsync(f.fileno())
+    except (AttributeError, OSError):
+        sync = getattr(os, 'sync', None)
+        if sync is not None:
+            sync()
+
+
+def _exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+class PersistentEquityCache:
+    """
+    Win probabilities kept on flash (or disk) across restarts, keyed by
+    canonical_key. Records are 16 bytes:
+
+        opponents, 2 hole cards, 5 board cards (0xFF when absent),
+        win probability (u16, /65535), precision (u32), Fletcher-16 checksum
+
+    appended to path one at a time. RAM only holds an LRU index from the
+    8 key bytes to each record's offset; values are read back on a hit.
+    Once the file holds twice max_entries records it is compacted: the
+    max_entries most recently used entries are written to path + '.tmp',
+    which then replaces path. A torn append fails its checksum and is
+    dropped on the next load, and a compaction cut short leaves either the
+    old file or the complete new one. Results below min_precision aren't
+    stored. If the filesystem is read-only (CircuitPython, unless boot.py
+    remounts it) the existing records are still served.
+    """
+    def __init__(self, path, max_entries=256, min_precision=500):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.max_entries = max_entries
+        self.min_precision = min_precision
+        self.writable = True
+        self._index = OrderedDict()
+        self._records = 0
+        self._record = bytearray(CACHE_RECORD_SIZE)
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def __len__(self):
+        return len(self._index)
+
+    def load(self):
+        """Rebuild the index from the file, recovering from an interrupted write"""
+        if not _exists(self.path) and _exists(self.tmp_path):
+            # Compaction finished writing but stopped before the rename
+            try:
+                os.rename(self.tmp_path, self.path)
+            except OSError:
+                pass
+        self._index = OrderedDict()
+        self._records = 0
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            return
+        record = self._record
+        clean = True
+        with f:
+            if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                clean = False
+            else:
+                offset = len(CACHE_MAGIC)
+                while True:
+                    size = f.readinto(record)
+                    if size != CACHE_RECORD_SIZE or _fletcher16(record, 14) != record[14] | (record[15] << 8):
+                        # Anything but a clean end is a torn append
+                        clean = not size
+                        break
+                    key = bytes(record[:8])
+                    self._index.pop(key, None)
+                    self._index[key] = offset
+                    offset += CACHE_RECORD_SIZE
+                    self._records += 1
+        while len(self._index) > self.max_entries:
+            del self._index[next(iter(self._index))]
+        if not clean:
+            # Drop the torn tail (or a foreign file) so appends line up again
+            self.compact()
+
+    def _pack_key(self, key):
+        hole, community, num_opponents = key
+        # Range keys (see PokerCalculator.range_key) aren't stored
+        if len(hole) != 2 or not isinstance(num_opponents, int):
+            return None
+        packed = bytearray(8)
+        packed[0] = num_opponents
+        packed[1] = hole[0]
+        packed[2] = hole[1]
+        for i in range(5):
+            packed[3 + i] = community[i] if i < len(community) else _NO_CARD
+        return bytes(packed)
+
+    def _read(self, offset):
+        """(win probability, precision) of the record at offset"""
+        record = self._record
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            f.readinto(record)
+        win_prob = (record[8] | (record[9] << 8)) / 65535
+        return win_prob, int.from_bytes(bytes(record[10:14]), 'little')
+
+    def get(self, key, precision=0):
+        packed = self._pack_key(key)
+        offset = self._index.pop(packed, None) if packed is not None else None
+        if offset is not None:
+            self._index[packed] = offset
+            try:
+                win_prob, stored = self._read(offset)
+            except OSError:
+                stored = -1
+            if stored >= precision:
+                self.hits += 1
+                return win_prob
+        self.misses += 1
+        return None
+
+    def put(self, key, win_prob, precision):
+        if not self.writable or precision < self.min_precision:
+            return
+        packed = self._pack_key(key)
+        if packed is None:
+            return
+        offset = self._index.get(packed)
+        if offset is not None:
+            try:
+                if self._read(offset)[1] >= precision:
+                    return
+            except OSError:
+                pass
+        record = self._record
+        record[:8] = packed
+        value = int(win_prob * 65535 + 0.5)
+        record[8] = value & 0xFF
+        record[9] = value >> 8
+        record[10:14] = min(precision, EXACT_PRECISION).to_bytes(4, 'little')
+        check = _fletcher16(record, 14)
+        record[14] = check & 0xFF
+        record[15] = check >> 8
+        try:
+            fresh = not _exists(self.path)
+            with open(self.path, 'ab') as f:
+                if fresh:
+                    f.write(CACHE_MAGIC)
+                # Appends go to the end whatever the current position says
+                offset = len(CACHE_MAGIC) + self._records * CACHE_RECORD_SIZE
+                f.write(record)
+                _sync(f)
+        except OSError:
+            # Read-only filesystem: keep serving what's there
+            self.writable = False
+            return
+        self._index.pop(packed, None)
+        self._index[packed] = offset
+        self._records += 1
+        if len(self._index) > self.max_entries:
+            del self._index[next(iter(self._index))]
+        if self._records >= 2 * self.max_entries:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the file with only the indexed entries, in LRU order"""
+        index = OrderedDict()
+        offset = len(CACHE_MAGIC)
+        try:
+            with open(self.tmp_path, 'wb') as out:
+                out.write(CACHE_MAGIC)
+                with open(self.path, 'rb') as f:
+                    record = self._record
+                    for key in self._index:
+                        f.seek(self._index[key])
+                        f.readinto(record)
+                        out.write(record)
+                        index[key] = offset
+                        offset += CACHE_RECORD_SIZE
+                _sync(out)
+            # FAT can't rename over a file; load() finishes the job if
+            # power goes between these two steps
+            os.remove(self.path)
+            os.rename(self.tmp_path, self.path)
+        except OSError:
+            self.writable = False
+            return
+        self._index = index
+        self._records = len(index)
+
+    def clear(self):
+        for path in (self.path, self.tmp_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._index = OrderedDict()
+        self._records = 0
+        self.hits = 0
+        self.misses = 0
+
+
+# Preflop equities come from preflop_table.py (see gen_preflop.py)
+PREFLOP_MAX_OPPONENTS = 9
+
+
+def preflop_index(card1, card2):
+    """
+    Index (0-168) of the canonical starting hand for two integer cards:
+    high_rank * 13 + low_rank when suited, low_rank * 13 + high_rank when
+    offsuit, and rank * 14 for pairs
+    """
+    high = card1 >> 2
+    low = card2 >> 2
+    if high < low:
+        high, low = low, high
+    if (card1 ^ card2) & 3:
+        return low * 13 + high
+    return high * 13 + low
+
+
+def preflop_example(index):
+    """Two card strings for the canonical starting hand at index"""
+    a = index // 13
+    b = index % 13
+    if a > b:  # suited
+        return [int_to_card(a * 4), int_to_card(b * 4)]
+    return [int_to_card(a * 4), int_to_card(b * 4 + 1)]
+
+
+# Precomputed 7-card lookup tables (see gen_tables.py for the generator).
+#
+# evaltables.bin layout, all values little-endian u32:
+#   header   16 bytes: b'PKEV', version, paired table length, reserved
+#   flush    8192 entries  (32 KiB)  strength of the flush suit's 13-bit rank mask
+#   unique   8192 entries  (32 KiB)  strength of 7 distinct ranks, no flush
+#   paired   49205 entries (192 KiB) strength of any 7-card rank multiset, no flush,
+#            indexed by multiset_index()
+# Total 262,372 bytes on flash. In 'file' mode the tables are indexed in place
+# through one open file and a 4 byte buffer, so RAM use is the 520 entry offset
+# list below (~2 KiB); 'mmap' maps the file on a desktop host, 'ram' reads it
+# into memory (~256 KiB, desktop only).
+TABLES_FILE = 'evaltables.bin'
+TABLES_MAGIC = b'PKEV'
+TABLES_VERSION = 1
+TABLES_HEADER_SIZE = 16
+FLUSH_TABLE_SIZE = 8192
+UNIQUE_TABLE_SIZE = 8192
+
+_MULTISET_OFFSETS = None
+
+
+def _build_multiset_offsets():
+    """
+    Offsets for ranking 7-card rank multisets (each rank used 0-4 times).
+    Ranks are visited from A down to 2 with rem cards still to place; a rank
+    holding c cards adds offsets[(rank * 8 + rem) * 5 + c].
+    """
+    global _MULTISET_OFFSETS
+    # ways[k][m]: ways to spread m cards over k ranks with at most 4 each
+    ways = [[0] * 8 for _ in range(14)]
+    ways[0][0] = 1
+    for k in range(1, 14):
+        for m in range(8):
+            for c in range(min(m, 4) + 1):
+                ways[k][m] += ways[k - 1][m - c]
+    offsets = [0] * (13 * 8 * 5)
+    for rank in range(13):
+        for rem in range(8):
+            total = 0
+            for c in range(5):
+                offsets[(rank * 8 + rem) * 5 + c] = total
+                if c <= rem:
+                    total += ways[rank][rem - c]
+    _MULTISET_OFFSETS = offsets
+    return ways[13][7]
+
+
+def multiset_index(rank_counts):
+    """Dense index (0-49204) of 7 cards given their packed 4-bit rank counts"""
+    if _MULTISET_OFFSETS is None:
+        _build_multiset_offsets()
+    if _TOP_BIT is None:
+        _build_rank_tables()
+    offsets = _MULTISET_OFFSETS
+    index = 0
+    rem = 7
+    for rank in range(12, -1, -1):
+        c = (rank_counts >> (rank << 2)) & 0xF
+        if c:
+            index += offsets[(rank * 8 + rem) * 5 + c]
+            rem -= c
+    return index
+
+
+def _default_tables_path():
+    try:
+        base = __file__.rsplit('/', 1)
+        if len(base) == 2:
+            return base[0] + '/' + TABLES_FILE
+    except NameError:
+        pass
+    return TABLES_FILE
+
+
+class EvalTables:
+    """
+    Table-driven 7-card evaluator backed by evaltables.bin.
+    The file is opened on the first lookup; mode is 'auto', 'mmap', 'ram' or 'file'.
+    """
+    def __init__(self, path=None, mode='auto'):
+        self.path = path or _default_tables_path()
+        self.mode = mode
+        self._file = None
+        self._table = None
+        self._buf = bytearray(4)
+        self._paired_base = 0
+        # Bound once, so evaluate_hole doesn't allocate a method per call
+        self._lookup = self.lookup
+
+    def load(self):
+        """Open the table file and check its header"""
+        if self._table is not None or self._file is not None:
+            return self
+        if _TOP_BIT is None:
+            _build_rank_tables()
+        if _MULTISET_OFFSETS is None:
+            _build_multiset_offsets()
+        f = open(self.path, 'rb')
+        header = f.read(TABLES_HEADER_SIZE)
+        if header[:4] != TABLES_MAGIC or int.from_bytes(header[4:8], 'little') != TABLES_VERSION:
+            f.close()
+            raise ValueError('bad evaluator table file: ' + self.path)
+        self.paired_size = int.from_bytes(header[8:12], 'little')
+        self._paired_base = FLUSH_TABLE_SIZE + UNIQUE_TABLE_SIZE
+
+        mode = self.mode
+        if mode == 'auto':
+            mode = 'mmap' if _can_mmap() else 'file'
+        if mode == 'mmap':
+            import mmap
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            f.close()
+            self._mmap = mapped
+            self._table = memoryview(mapped)[TABLES_HEADER_SIZE:].cast('I')
+        elif mode == 'ram':
+            from array import array
+            self._table = array('I')
+            self._table.frombytes(f.read())
+            f.close()
+        else:
+            self._file = f
+        self.mode = mode
+        return self
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._table is not None:
+            if self.mode == 'mmap':
+                self._table.release()
+                self._mmap.close()
+            self._table = None
+
+    def _entry(self, i):
+        table = self._table
+        if table is not None:
+            return table[i]
+        f = self._file
+        if f is None:
+            self.load()
+            return self._entry(i)
+        f.seek(TABLES_HEADER_SIZE + (i << 2))
+        f.readinto(self._buf)
+        buf = self._buf
+        return buf[0] | (buf[1] << 8) | (buf[2] << 16) | (buf[3] << 24)
+
+    def evaluate(self, cards):
+        """Score exactly 7 integer cards; other sizes use evaluate_ints"""
+        if len(cards) != 7:
+            return evaluate_ints(cards)
+        if self._table is None and self._file is None:
+            self.load()
+        m1 = m2 = m3 = m4 = 0
+        counts = 0
+        suit_masks = _SUIT_MASKS
+        suit_masks[0] = suit_masks[1] = suit_masks[2] = suit_masks[3] = 0
+        for c in cards:
+            bit = 1 << (c >> 2)
+            s = c & 3
+            suit_masks[s] |= bit
+            counts += 1 << (s << 2)
+            if m1 & bit:
+                if m2 & bit:
+                    if m3 & bit:
+                        m4 |= bit
+                    else:
+                        m3 |= bit
+                else:
+                    m2 |= bit
+            else:
+                m1 |= bit
+        return self.lookup(m1, m2, m3, m4, _flush_mask(counts, suit_masks))
+
+    def evaluate_hole(self, summary, card1, card2):
+        """Like the module's evaluate_hole, scored from the tables"""
+        if self._table is None and self._file is None:
+            self.load()
+        return evaluate_hole(summary, card1, card2, self._lookup)
+
+    def lookup(self, m1, m2, m3, m4, flush):
+        """Strength of 7 cards given as the rank masks and flush mask of evaluate_ints"""
+        if flush:
+            return self._entry(flush)
+        if not m2:
+            return self._entry(FLUSH_TABLE_SIZE + m1)
         
-        deck = []
-        for suit in self.suits:
-            for rank in self.ranks:
-                card = f"{suit}{rank}"
-                if card not in exclude_cards:
-                    deck.append(card)
+        offsets = _MULTISET_OFFSETS
+        top = _TOP_BIT
+        index = self._paired_base
+        rem = 7
+        while m1:
+            rank = top[m1]
+            bit = 1 << rank
+            m1 ^= bit
+            c = 1
+            if m2 & bit:
+                c = 2
+                if m3 & bit:
+                    c = 4 if m4 & bit else 3
+            index += offsets[(rank * 8 + rem) * 5 + c]
+            rem -= c
+        return self._entry(index)
+
+
+def _can_mmap():
+    try:
+        import mmap
+        import sys
+        return sys.byteorder == 'little' and hasattr(mmap, 'ACCESS_READ')
+    except ImportError:
+        return False
+
+
+class XorShift:
+    """
+    Fast seedable random source for the engine: a 64-bit xorshift generator
+    kept in four 16-bit words (shifts 9, 7, 6, period 2**64 - 1) with the sum
+    of the last two words as output. Every step stays a small int, so
+    MicroPython doesn't allocate, and a seed reproduces a run bit for bit.
+    split() hands out non-overlapping streams of 2**32 steps for parallel use.
+    """
+    # x**(2**32) modulo the generator's characteristic polynomial, one
+    # 16-bit word per state word; see jump()
+    JUMP = (0x76D3, 0xB08D, 0x6CED, 0x1588)
+
+    def __init__(self, seed=None):
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        """Seed from an int (None picks one from the random module)"""
+        if seed is None:
+            seed = random.getrandbits(32)
+        # splitmix64 spreads any seed over all four words
+        z = (seed + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        z ^= z >> 31
+        self.setstate((z & 0xFFFF, (z >> 16) & 0xFFFF, (z >> 32) & 0xFFFF, (z >> 48) & 0xFFFF))
+
+    def getstate(self):
+        return self.x, self.y, self.z, self.w
+
+    def setstate(self, state):
+        self.x, self.y, self.z, self.w = state
+        if not (self.x or self.y or self.z or self.w):
+            self.w = 1  # the all-zero state never leaves zero
+
+    def next16(self):
+        """Next 16 random bits"""
+        x = self.x
+        t = (x ^ (x << 9)) & 0xFFFF
+        z = self.w
+        self.x = self.y
+        self.y = self.z
+        self.z = z
+        w = (z ^ (z >> 6)) ^ (t ^ (t >> 7))
+        self.w = w
+        return (w + z) & 0xFFFF
+
+    def randrange(self, n):
+        """
+        Uniform int in [0, n) without modulo bias: multiply-shift on 16 bits
+        up to n = 65536, mask-and-reject on 30 bits above that
+        """
+        if n <= 0x10000:
+            m = self.next16() * n
+            if (m & 0xFFFF) < n:
+                threshold = (0x10000 - n) % n
+                while (m & 0xFFFF) < threshold:
+                    m = self.next16() * n
+            return m >> 16
+        if n > 0x40000000:
+            raise ValueError('randrange() limit is 2**30')
+        mask = 0x1FFFF
+        while mask < n - 1:
+            mask = (mask << 1) | 1
+        while True:
+            value = ((self.next16() << 14) ^ self.next16()) & mask
+            if value < n:
+                return value
+
+    def random(self):
+        """Float in [0, 1) with 30 random bits"""
+        return (((self.next16() << 14) ^ self.next16()) & 0x3FFFFFFF) / 1073741824
+
+    def shuffle_front(self, deck, size, count, start=0):
+        """
+        Partial Fisher-Yates: move count random cards of deck[start:size] to
+        deck[start:start + count]. Same draws as count calls to randrange,
+        with the generator inlined since this is the dealing hot loop.
+        """
+        x = self.x
+        y = self.y
+        z = self.z
+        w = self.w
+        for i in range(start, start + count):
+            n = size - i
+            threshold = -1
+            while True:
+                t = (x ^ (x << 9)) & 0xFFFF
+                x = y
+                y = z
+                z = w
+                w = (w ^ (w >> 6)) ^ (t ^ (t >> 7))
+                m = ((w + z) & 0xFFFF) * n
+                low = m & 0xFFFF
+                if low >= n:
+                    break
+                if threshold < 0:
+                    threshold = (0x10000 - n) % n
+                if low >= threshold:
+                    break
+            j = i + (m >> 16)
+            deck[i], deck[j] = deck[j], deck[i]
+        self.x = x
+        self.y = y
+        self.z = z
+        self.w = w
+
+    def jump(self):
+        """Advance 2**32 steps at the cost of 64"""
+        acc = [0, 0, 0, 0]
+        for word in self.JUMP:
+            for bit in range(16):
+                if (word >> bit) & 1:
+                    acc[0] ^= self.x
+                    acc[1] ^= self.y
+                    acc[2] ^= self.z
+                    acc[3] ^= self.w
+                self.next16()
+        self.setstate(acc)
+
+    def split(self):
+        """A generator for the next 2**32 steps of this stream; this one jumps past them"""
+        other = XorShift(0)
+        other.setstate(self.getstate())
+        self.jump()
+        return other
+
+
+class Dealer:
+    """
+    The residual deck for one query as a byte array. Each deal is a partial
+    Fisher-Yates shuffle in place, so dealing allocates nothing per trial.
+    """
+    def __init__(self, known_cards, rng=None):
+        known = 0
+        for card in known_cards:
+            known |= 1 << card
+        self.deck = bytearray([card for card in range(52) if not (known >> card) & 1])
+        self.size = len(self.deck)
+        if rng is None:
+            rng = XorShift()
+        self.randrange = rng.randrange
+        # XorShift deals with its generator inlined; other sources go card by card
+        self.shuffle_front = getattr(rng, 'shuffle_front', None)
+        # Where each card sits in deck, kept up to date by remove/deal_tracked
+        self.position = bytearray(52)
+        for i in range(self.size):
+            self.position[self.deck[i]] = i
+        self.active = self.size
+
+    def deal(self, count, start=0):
+        """
+        Move count random cards to the front of the deck and return the deck.
+        A non-zero start deals more cards after the first start, continuing
+        the same shuffle.
+        """
+        deck = self.deck
+        size = self.size
+        if self.shuffle_front is not None:
+            self.shuffle_front(deck, size, count, start)
+            return deck
+        randrange = self.randrange
+        for i in range(start, start + count):
+            j = i + randrange(size - i)
+            deck[i], deck[j] = deck[j], deck[i]
         return deck
+
+    def remove(self, card):
+        """Park card behind the active part of the deck until the next reset"""
+        deck = self.deck
+        position = self.position
+        last = self.active - 1
+        i = position[card]
+        other = deck[last]
+        deck[i] = other
+        position[other] = i
+        deck[last] = card
+        position[card] = last
+        self.active = last
+
+    def reset(self):
+        self.active = self.size
+
+    def deal_tracked(self, count):
+        """Like deal, but only from the active cards and keeping positions up to date"""
+        deck = self.deck
+        position = self.position
+        active = self.active
+        randrange = self.randrange
+        for i in range(count):
+            j = i + randrange(active - i)
+            card = deck[j]
+            deck[j] = deck[i]
+            position[deck[j]] = j
+            deck[i] = card
+            position[card] = i
+        return deck
+
+
+class Profiler:
+    """
+    Phase timers (nanoseconds) and counters filled in by a PokerCalculator
+    created with profiler=Profiler(). Phases:
+        parse     card strings to integers
+        lookup    cache, preflop table and exact enumeration
+        deck      building the residual deck for a batch
+        deal      shuffling and copying out runouts
+        evaluate  hand evaluations
+        compare   the opponent loop around the evaluations
+        sampler   batches run whole by the NumPy backend or a special sampler
+    Timers include the cost of reading the clock. callback(profiler) is
+    called after every finished query, e.g. to print summary() over serial.
+    """
+    PHASES = ('parse', 'lookup', 'deck', 'deal', 'evaluate', 'compare', 'sampler')
+    COUNTERS = ('queries', 'trials', 'evaluations', 'cache_hits', 'cache_misses', 'early_exits')
+
+    def __init__(self, callback=None, clock=_clock_ns):
+        self.callback = callback
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.times = {}
+        for phase in self.PHASES:
+            self.times[phase] = 0
+        self.counts = {}
+        for counter in self.COUNTERS:
+            self.counts[counter] = 0
+
+    def query_done(self):
+        self.counts['queries'] += 1
+        if self.callback is not None:
+            self.callback(self)
+
+    def summary(self):
+        """One line of counters and per-phase milliseconds"""
+        parts = ['%s=%d' % (counter, self.counts[counter]) for counter in self.COUNTERS]
+        parts += ['%s=%dms' % (phase, self.times[phase] // 1000000) for phase in self.PHASES]
+        trials = self.counts['trials']
+        if trials:
+            total = 0
+            for phase in self.PHASES:
+                total += self.times[phase]
+            parts.append('us/trial=%.1f' % (total / trials / 1000))
+        return ' '.join(parts)
+
+
+class ThroughputModel:
+    """
+    Monte Carlo trials per second on this machine for each street (board
+    size) and opponent count, used to size batches for a time budget.
+    calibrate() times short runs; afterwards every budgeted batch is fed
+    back through observe(), so the rates follow the backend, tables and
+    load actually in use. Situations never timed are extrapolated from the
+    nearest timed opponent count, assuming cost grows with the number of
+    players, or from DEFAULT_RATE when nothing has been timed yet.
+    """
+    DEFAULT_RATE = 1000
+    # Weight of a new measurement in the running average
+    SMOOTHING = 0.25
+    # Timings are pooled until they span this long, so a coarse clock
+    # (about 1ms on CircuitPython) still gives usable rates
+    MIN_SAMPLE_NS = 5000000
+    CALIBRATION_MS = 20
+    # Engine time per calibration step
+    CALIBRATION_STEP_NS = 5000000
+    # Hero and board used for calibration, sliced to each street
+    CALIBRATION_HOLE = (51, 47)  # AsKs
+    CALIBRATION_BOARD = (20, 25, 30, 1, 36)  # h7 d8 c9 d2 hJ
+
+    def __init__(self, clock=_clock_ns):
+        self.clock = clock
+        # (board size, opponents) -> [trials per second or None, pooled trials, pooled ns]
+        self.rates = {}
+
+    def rate(self, board_size, num_opponents):
+        """Estimated trials per second"""
+        entry = self.rates.get((board_size, num_opponents))
+        if entry is not None and entry[0] is not None:
+            return entry[0]
+        nearest = None
+        for (size, opponents), entry in self.rates.items():
+            if entry[0] is None:
+                continue
+            # Prefer the same street, then the closest opponent count
+            distance = abs(opponents - num_opponents) + (0 if size == board_size else 100)
+            if nearest is None or distance < nearest[0]:
+                nearest = (distance, entry[0], opponents)
+        if nearest is None:
+            return self.DEFAULT_RATE
+        return nearest[1] * (nearest[2] + 1) / (num_opponents + 1)
+
+    def trials_for(self, board_size, num_opponents, budget_ns):
+        """Trials expected to fit in budget_ns, at least 1"""
+        return max(1, int(self.rate(board_size, num_opponents) * budget_ns / 1000000000))
+
+    def observe(self, board_size, num_opponents, trials, elapsed_ns):
+        """Fold a timed run of trials into the rates"""
+        key = (board_size, num_opponents)
+        entry = self.rates.get(key)
+        if entry is None:
+            entry = self.rates[key] = [None, 0, 0]
+        entry[1] += trials
+        entry[2] += elapsed_ns
+        if entry[2] >= self.MIN_SAMPLE_NS:
+            measured = entry[1] * 1000000000 / entry[2]
+            if entry[0] is None:
+                entry[0] = measured
+            else:
+                entry[0] += self.SMOOTHING * (measured - entry[0])
+            entry[1] = 0
+            entry[2] = 0
+
+    def calibrate(self, calc, opponent_counts=(1,), streets=(3, 4, 5), step_ns=None):
+        """
+        Generator timing calc's Python Monte Carlo loop for each street and
+        opponent count, CALIBRATION_MS each. It yields after the warm-up and
+        after every batch, and batches are sized to take about step_ns
+        (CALIBRATION_STEP_NS by default), so a UI can run it in idle time
+        one step per loop pass.
+        """
+        if step_ns is None:
+            step_ns = self.CALIBRATION_STEP_NS
+        # Time the Python loop: batches the backend would take are left to
+        # calc.backend_throughput, which learns from budgeted runs
+        largest = calc.backend.min_batch - 1 if calc.backend is not None else EXACT_PRECISION
+        player = list(self.CALIBRATION_HOLE)
+        budget_ns = self.CALIBRATION_MS * 1000000
+        # Untimed first runs, which build the evaluator's tables, then the
+        # backend's (if any) so its setup isn't timed as trials
+        board = list(self.CALIBRATION_BOARD[:streets[0]])
+        calc.simulate(player, board, opponent_counts[0], 1)
+        yield
+        if calc.backend is not None:
+            calc.backend.simulate(player, board, opponent_counts[0], calc.backend.min_batch)
+            yield
+        for board_size in streets:
+            board = list(self.CALIBRATION_BOARD[:board_size])
+            for num_opponents in opponent_counts:
+                spent = 0
+                batch = 1
+                while spent < budget_ns:
+                    start = self.clock()
+                    calc.simulate(player, board, num_opponents, batch)
+                    elapsed = self.clock() - start
+                    spent += elapsed
+                    self.observe(board_size, num_opponents, batch, elapsed)
+                    batch = min(batch * 2, largest, self.trials_for(board_size, num_opponents,
+                                                                    min(step_ns, budget_ns - spent)))
+                    yield
+                entry = self.rates[(board_size, num_opponents)]
+                if entry[0] is None and entry[2]:
+                    # Under MIN_SAMPLE_NS in total: use what there is
+                    entry[0] = entry[1] * 1000000000 / entry[2]
+                    entry[1] = 0
+                    entry[2] = 0
+
+def _load_numpy_backend():
+    # NumPy only exists on desktop Pythons; don't spend device boot time
+    # compiling pokerlib_np just to fail on its import
+    import sys
+    if sys.implementation.name != 'cpython':
+        return None
+    try:
+        import pokerlib_np
+    except ImportError:
+        return None
+    return pokerlib_np.NumpyBackend()
+
+
+class PokerCalculator:
+    def __init__(self, tables=None, preflop=True, backend='auto', rng=None, cache_size=256,
+                 variance_reduction=False, profiler=None, persistent_cache=None):
+        # Optional lookup tables: an EvalTables, or True for the bundled file
+        if tables is True:
+            tables = EvalTables()
+        self.tables = tables
+        self.evaluate = tables.evaluate if tables is not None else evaluate_ints
+        self.evaluate_hole = tables.evaluate_hole if tables is not None else evaluate_hole
+        
+        # Vectorized backend for large simulation batches: 'auto' uses
+        # pokerlib_np when NumPy is importable, None keeps the Python loop
+        if backend == 'auto':
+            backend = _load_numpy_backend()
+        self.backend = backend
+        
+        # Random source for the Python loop: an XorShift, a seed for one, or
+        # anything else with randrange() (such as the random module). The
+        # backend is seeded from it, here and whenever rng is replaced.
+        if rng is None or isinstance(rng, int):
+            rng = XorShift(rng)
+        self.rng = rng
+        
+        # Use the stratified, hand-reusing sampler (see reduced_draws) for
+        # Monte Carlo queries
+        self.variance_reduction = variance_reduction
+        
+        # LRU of results shared across suit-isomorphic situations (0 disables)
+        self.cache = EquityCache(cache_size) if cache_size else None
+        
+        # Results kept across restarts (a PersistentEquityCache); looked up
+        # after self.cache and written once a calculation finishes
+        self.persistent_cache = persistent_cache
+        
+        # Answer preflop queries from preflop_table.py (loaded on first use)
+        self.preflop = preflop
+        self._preflop_equity = None
+        
+        # Phase timers and counters (a Profiler); None keeps the hot loop bare
+        self.profiler = profiler
+        
+        # Trials per second by street and opponent count, for budget_ms
+        # queries: the Python loop's, and the backend's for batches it runs
+        self.throughput = ThroughputModel()
+        self.backend_throughput = ThroughputModel()
+        
+        # Buffers reused by the simulations: a 5-card board and its
+        # summarize_board summary
+        self._community = [0] * 5
+        self._board_summary = [0] * 7
+        
+        # Card ranks and suits
+        self.ranks = RANKS
+        self.suits = SUITS
+    
+    @property
+    def rng(self):
+        return self._rng
+    
+    @rng.setter
+    def rng(self, rng):
+        self._rng = rng
+        backend = self.backend
+        if backend is not None and hasattr(backend, 'seed'):
+            # 60 bits drawn from rng, so one seed reproduces either engine
+            backend.seed((rng.randrange(1 << 30) << 30) | rng.randrange(1 << 30))
     
     def get_all_combinations(self, cards, r):
         """Get all combinations of r cards from the list (without itertools)"""
@@ -46,135 +1323,804 @@ class PokerCalculator:
                 result.append([cards[i]] + combo)
         return result
     
+    def create_int_deck(self, exclude_cards=None):
+        """Create a deck of integer cards excluding the given integer cards"""
+        if exclude_cards is None:
+            exclude_cards = []
+        return [card for card in range(52) if card not in exclude_cards]
+    
     def evaluate_hand(self, cards):
-        """Evaluate a 5-card hand and return its rank"""
+        """Evaluate a 5-card hand and return its strength and hand type"""
         if len(cards) != 5:
             return 0, 'invalid'
-        
-        # Parse cards
-        ranks = []
-        suits = []
-        for card in cards:
-            if len(card) == 3:  # h10, d10, etc.
-                suits.append(card[0])
-                ranks.append(card[1:])
-            else:  # hA, dK, etc.
-                suits.append(card[0])
-                ranks.append(card[1])
-        
-        # Count occurrences
-        rank_counts = {}
-        for rank in ranks:
-            rank_counts[rank] = rank_counts.get(rank, 0) + 1
-        
-        suit_counts = {}
-        for suit in suits:
-            suit_counts[suit] = suit_counts.get(suit, 0) + 1
-        
-        # Check for flush
-        is_flush = max(suit_counts.values()) == 5
-        
-        # Check for straight
-        rank_values = [self.ranks.index(rank) for rank in ranks]
-        rank_values.sort()
-        is_straight = (max(rank_values) - min(rank_values) == 4 and len(set(rank_values)) == 5) or \
-                     (set(rank_values) == {0, 1, 2, 3, 12})  # A-2-3-4-5 straight
-        
-        # Determine hand type
-        if is_straight and is_flush:
-            if min(rank_values) == 8:  # A-high straight flush
-                return 10, 'royal_flush'
-            else:
-                return 9, 'straight_flush'
-        elif max(rank_counts.values()) == 4:
-            return 8, 'four_of_a_kind'
-        elif sorted(rank_counts.values()) == [2, 3]:
-            return 7, 'full_house'
-        elif is_flush:
-            return 6, 'flush'
-        elif is_straight:
-            return 5, 'straight'
-        elif max(rank_counts.values()) == 3:
-            return 4, 'three_of_a_kind'
-        elif list(rank_counts.values()).count(2) == 2:
-            return 3, 'two_pair'
-        elif max(rank_counts.values()) == 2:
-            return 2, 'pair'
-        else:
-            return 1, 'high_card'
+        strength = self.evaluate(cards_to_ints(cards))
+        return strength, hand_type(strength)
     
     def get_best_hand(self, hole_cards, community_cards):
         """Get the best 5-card hand from hole cards and community cards"""
         all_cards = hole_cards + community_cards
         if len(all_cards) < 5:
             return 0, 'not_enough_cards'
-        
-        best_hand = 0
-        best_hand_type = 'high_card'
-        
-        # Try all combinations of 5 cards
-        for combo in self.get_all_combinations(all_cards, 5):
-            hand_value, hand_type = self.evaluate_hand(combo)
-            if hand_value > best_hand:
-                best_hand = hand_value
-                best_hand_type = hand_type
-        
-        return best_hand, best_hand_type
+        strength = self.evaluate(cards_to_ints(all_cards))
+        return strength, hand_type(strength)
     
-    def calculate_win_probability(self, player_hole_cards, community_cards, num_opponents=1, simulations=100):
+    def count_combinations(self, known_cards, num_community, num_opponents):
+        """Number of (runout, opponent holdings) combinations left to enumerate"""
+        unknown = 52 - known_cards
+        remaining_community = 5 - num_community
+        return choose(unknown, remaining_community) * holding_sets(unknown - remaining_community, num_opponents)
+    
+    def calculate_win_probability(self, player_hole_cards, community_cards, num_opponents=1, simulations=100,
+                                  exact=None, exact_threshold=EXACT_THRESHOLD, opponent_ranges=None):
         """
         Calculate probability of winning given:
         - player_hole_cards: list of 2 cards (e.g., ['hA', 'dK'])
         - community_cards: list of community cards (e.g., ['h7', 'd8', 'c9'])
         - num_opponents: number of opponents
         - simulations: number of Monte Carlo simulations
+        - exact: True to enumerate every runout and opponent holding, False for
+          Monte Carlo, None to enumerate when there are at most exact_threshold
+          combinations
+        - opponent_ranges: a range such as "22+,A2s+,KTo+" or "15%" for every
+          opponent, or a list with one per opponent (Monte Carlo only)
         """
-        wins = 0
+        # Parse the known cards once; the simulation only handles integers
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.clock()
+        player = cards_to_ints(player_hole_cards)
+        board = cards_to_ints(community_cards)
+        if profiler is not None:
+            profiler.times['parse'] += profiler.clock() - start
+        
+        win_prob = self.int_win_probability(player, board, num_opponents, simulations, exact,
+                                            exact_threshold, opponent_ranges)
+        if profiler is not None:
+            profiler.query_done()
+        return win_prob
+    
+    def budget_win_probability(self, player_hole_cards, community_cards, num_opponents=1, budget_ms=150,
+                               exact=None, exact_threshold=EXACT_THRESHOLD, opponent_ranges=None):
+        """
+        calculate_win_probability running as many Monte Carlo trials as fit
+        in budget_ms (see ThroughputModel). Returns (win_prob, trials):
+        trials is the number run, the combinations enumerated for an exact
+        answer, or 0 from the preflop table or the cache.
+        """
+        win_prob = None
+        trials = 0
+        for win_prob, stderr, trials in self.iter_win_probability(
+                player_hole_cards, community_cards, num_opponents, batch_size=None, max_simulations=None,
+                exact=exact, exact_threshold=exact_threshold, opponent_ranges=opponent_ranges,
+                budget_ms=budget_ms):
+            pass
+        return win_prob, trials
+    
+    def int_win_probability(self, player, board, num_opponents=1, simulations=100, exact=None,
+                            exact_threshold=EXACT_THRESHOLD, opponent_ranges=None):
+        """calculate_win_probability for integer cards"""
+        if opponent_ranges is not None:
+            compiled = self.compile_ranges(opponent_ranges, num_opponents)
+            key = None
+            if self.cache is not None:
+                key = self.range_key(player, board, compiled)
+                win_prob = self.cache_get(key, simulations)
+                if win_prob is not None:
+                    return win_prob
+            win_prob = self.simulate(player, board, num_opponents, simulations, compiled) / simulations
+            if key is not None:
+                self.cache.put(key, win_prob, simulations)
+            return win_prob
         
+        # The preflop table is instant, so its answers aren't cached
+        uncached = self.cache is None and self.persistent_cache is None
+        if uncached or self.uses_preflop_table(player, board, num_opponents):
+            win_prob = self.direct_win_probability(player, board, num_opponents, exact, exact_threshold)
+            if win_prob is None:
+                win_prob = self.simulate(player, board, num_opponents, simulations) / simulations
+            return win_prob
+        
+        key = canonical_key(player, board, num_opponents)
+        win_prob = self.cache_get(key, EXACT_PRECISION if exact else simulations)
+        if win_prob is not None:
+            return win_prob
+        win_prob = self.direct_win_probability(player, board, num_opponents, exact, exact_threshold)
+        precision = EXACT_PRECISION
+        if win_prob is None:
+            win_prob = self.simulate(player, board, num_opponents, simulations) / simulations
+            precision = simulations
+        self.cache_put(key, win_prob, precision)
+        return win_prob
+    
+    def cache_get(self, key, precision):
+        """Look key up in self.cache, then the persistent cache, counted by the profiler"""
+        win_prob = None
+        if self.cache is not None:
+            win_prob = self.cache.get(key, precision)
+        if win_prob is None and self.persistent_cache is not None:
+            win_prob = self.persistent_cache.get(key, precision)
+            if win_prob is not None and self.cache is not None:
+                self.cache.put(key, win_prob, precision)
+        if self.profiler is not None:
+            self.profiler.counts['cache_misses' if win_prob is None else 'cache_hits'] += 1
+        return win_prob
+    
+    def cache_put(self, key, win_prob, precision, final=True):
+        """Record a result in self.cache and, once final, in the persistent cache"""
+        if self.cache is not None:
+            self.cache.put(key, win_prob, precision)
+        if final and self.persistent_cache is not None:
+            self.persistent_cache.put(key, win_prob, precision)
+    
+    def store_result(self, player, board, num_opponents, win_prob, precision):
+        """
+        Keep a win probability for integer cards worked out elsewhere (such
+        as by offload_host.py), precision being its trial count or EXACT_PRECISION
+        """
+        self.cache_put(canonical_key(player, board, num_opponents), win_prob, precision)
+    
+    def compile_ranges(self, opponent_ranges, num_opponents):
+        """One compiled range per opponent from a range (or list of ranges) as accepted by ranges.compile_range"""
+        import ranges
+        if isinstance(opponent_ranges, (list, tuple)):
+            if len(opponent_ranges) != num_opponents:
+                raise ValueError('expected %d opponent ranges' % num_opponents)
+            return [ranges.compile_range(spec) for spec in opponent_ranges]
+        return [ranges.compile_range(opponent_ranges)] * num_opponents
+    
+    def range_key(self, player, board, compiled):
+        """Cache key for a query against opponent ranges (ranges are suit-symmetric)"""
+        hole, community = canonical_cards(player, board)
+        return hole, community, tuple(hand_range.text for hand_range in compiled)
+    
+    def direct_win_probability(self, player, board, num_opponents, exact=None, exact_threshold=EXACT_THRESHOLD):
+        """
+        Win probability for integer cards from the preflop table or exact
+        enumeration, or None when the query needs Monte Carlo
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.clock()
+        win_prob = None
+        if self.uses_preflop_table(player, board, num_opponents):
+            win_prob = self.preflop_win_probability(player, num_opponents)
+        else:
+            if exact is None:
+                combinations = self.count_combinations(len(player) + len(board), len(board), num_opponents)
+                exact = combinations <= exact_threshold
+            if exact:
+                win_prob = self.enumerate_win_probability(player, board, num_opponents)
+        if profiler is not None:
+            profiler.times['lookup'] += profiler.clock() - start
+        return win_prob
+    
+    def simulate(self, player, board, num_opponents, simulations, opponent_ranges=None):
+        """
+        Run Monte Carlo trials for integer cards and return how many the player won.
+        opponent_ranges is a list of compiled ranges, one per opponent (see ranges.py).
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.clock()
+        if opponent_ranges is not None:
+            wins = self.simulate_ranges(player, board, opponent_ranges, simulations)
+        elif self.uses_reduced_sampler(board, num_opponents):
+            wins = self.simulate_reduced(player, board, num_opponents, simulations)
+        elif self.backend is not None and simulations >= self.backend.min_batch:
+            wins = self.backend.simulate(player, board, num_opponents, simulations)
+        elif profiler is not None:
+            return self.simulate_profiled(player, board, num_opponents, simulations)
+        else:
+            return self.simulate_trials(player, board, num_opponents, simulations)
+        if profiler is not None:
+            profiler.times['sampler'] += profiler.clock() - start
+            profiler.counts['trials'] += simulations
+        return wins
+    
+    def simulate_trials(self, player, board, num_opponents, simulations):
+        """The plain Monte Carlo loop: deal every opponent and the runout at random"""
+        remaining_community = 5 - len(board)
+        runout_start = 2 * num_opponents
+        dealer = Dealer(player + board, self.rng)
+        if runout_start + remaining_community > dealer.size:
+            raise ValueError('not enough cards left for %d opponents' % num_opponents)
+        evaluate_hole = self.evaluate_hole
+        
+        # The board is summarized once per trial; each player then only
+        # costs folding in their two hole cards
+        community = self._community
+        summary = self._board_summary
+        for i in range(len(board)):
+            community[i] = board[i]
+        first = len(board)
+        card1 = player[0]
+        card2 = player[1]
+        deal = dealer.deal
+        end = remaining_community + runout_start
+        
+        wins = 0
         for _ in range(simulations):
-            # Create deck excluding known cards
-            known_cards = player_hole_cards + community_cards
-            deck = self.create_deck(known_cards)
+            # Deal the runout first; opponents are dealt one at a time,
+            # only until one of them beats the player
+            deck = deal(remaining_community)
+            for i in range(remaining_community):
+                community[first + i] = deck[i]
+            summarize_board(community, summary)
+            player_strength = evaluate_hole(summary, card1, card2)
             
-            # Deal random hole cards to opponents
-            opponent_hands = []
-            for _ in range(num_opponents):
-                if len(deck) >= 2:
-                    # Use random.choice instead of random.sample
-                    card1 = random.choice(deck)
-                    deck.remove(card1)
-                    card2 = random.choice(deck)
-                    deck.remove(card2)
-                    opponent_hole = [card1, card2]
-                    opponent_hands.append(opponent_hole)
+            # Check if player wins (ties count as a win, as before)
+            for i in range(remaining_community, end, 2):
+                deal(2, i)
+                if evaluate_hole(summary, deck[i], deck[i + 1]) > player_strength:
+                    break
+            else:
+                wins += 1
+        
+        return wins
+    
+    def simulate_profiled(self, player, board, num_opponents, simulations):
+        """
+        simulate_trials with every phase timed and counted into self.profiler.
+        Kept separate so the plain loop pays nothing for instrumentation.
+        """
+        profiler = self.profiler
+        clock = profiler.clock
+        times = profiler.times
+        counts = profiler.counts
+        
+        start = clock()
+        remaining_community = 5 - len(board)
+        runout_start = 2 * num_opponents
+        dealer = Dealer(player + board, self.rng)
+        if runout_start + remaining_community > dealer.size:
+            raise ValueError('not enough cards left for %d opponents' % num_opponents)
+        evaluate_hole = self.evaluate_hole
+        community = self._community
+        summary = self._board_summary
+        for i in range(len(board)):
+            community[i] = board[i]
+        first = len(board)
+        card1 = player[0]
+        card2 = player[1]
+        deal = dealer.deal
+        end = remaining_community + runout_start
+        times['deck'] += clock() - start
+        
+        wins = 0
+        evaluations = 0
+        early_exits = 0
+        hero_ns = 0
+        opponent_ns = 0
+        opponent_deal_ns = 0
+        for _ in range(simulations):
+            start = clock()
+            deck = deal(remaining_community)
+            for i in range(remaining_community):
+                community[first + i] = deck[i]
+            dealt_at = clock()
+            times['deal'] += dealt_at - start
+            summarize_board(community, summary)
+            player_strength = evaluate_hole(summary, card1, card2)
+            evaluated_at = clock()
+            hero_ns += evaluated_at - dealt_at
+            evaluations += 1
             
-            # Complete the community cards if needed
-            remaining_community = 5 - len(community_cards)
-            if remaining_community > 0 and len(deck) >= remaining_community:
-                additional_community = []
-                for _ in range(remaining_community):
-                    card = random.choice(deck)
-                    deck.remove(card)
-                    additional_community.append(card)
-                final_community = community_cards + additional_community
+            for i in range(remaining_community, end, 2):
+                start = clock()
+                deal(2, i)
+                dealt_at = clock()
+                opponent_deal_ns += dealt_at - start
+                strength = evaluate_hole(summary, deck[i], deck[i + 1])
+                opponent_ns += clock() - dealt_at
+                evaluations += 1
+                if strength > player_strength:
+                    if i + 2 < end:
+                        early_exits += 1
+                    break
             else:
-                final_community = community_cards
+                wins += 1
+            times['compare'] += clock() - evaluated_at
+        
+        # Opponent dealing and evaluations also ran inside the timed compare loop
+        times['deal'] += opponent_deal_ns
+        times['evaluate'] += hero_ns + opponent_ns
+        times['compare'] -= opponent_ns + opponent_deal_ns
+        counts['trials'] += simulations
+        counts['evaluations'] += evaluations
+        counts['early_exits'] += early_exits
+        return wins
+    
+    def iter_win_probability(self, player_hole_cards, community_cards, num_opponents=1, batch_size=50,
+                             max_simulations=10000, target_width=None, z=1.96, exact=None,
+                             exact_threshold=EXACT_THRESHOLD, opponent_ranges=None, budget_ms=None):
+        """
+        Progressive version of calculate_win_probability. Runs Monte Carlo in
+        batches of batch_size and yields (estimate, stderr, samples_done) after
+        each batch, stopping after max_simulations or once the z-score
+        confidence interval is narrower than target_width (e.g. 0.05 for +/-2.5%).
+        Exact answers are yielded once with a stderr of 0 and the number of
+        combinations enumerated; preflop table and cached answers with 0 samples.
+        
+        budget_ms also stops it once the batches have taken that long in
+        total, the last ones shrunk to fit using self.throughput. With a
+        budget, batch_size=None sizes batches to about BUDGET_BATCH_NS each
+        (a share of the time left when the backend runs them, tracked in
+        self.backend_throughput) and max_simulations=None removes the trial
+        limit.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.clock()
+        player = cards_to_ints(player_hole_cards)
+        board = cards_to_ints(community_cards)
+        if profiler is not None:
+            profiler.times['parse'] += profiler.clock() - start
+        
+        for result in self.iter_int_win_probability(player, board, num_opponents, batch_size,
+                                                    max_simulations, target_width, z, exact,
+                                                    exact_threshold, opponent_ranges, budget_ms):
+            yield result
+        if profiler is not None:
+            profiler.query_done()
+    
+    def iter_int_win_probability(self, player, board, num_opponents=1, batch_size=50,
+                                 max_simulations=10000, target_width=None, z=1.96, exact=None,
+                                 exact_threshold=EXACT_THRESHOLD, opponent_ranges=None, budget_ms=None):
+        """iter_win_probability for integer cards"""
+        profiler = self.profiler
+        throughput = self.throughput
+        street = len(board)
+        budget_ns = None
+        # Budgeted batches go to the backend whole, sized from its own rates
+        backend_budget = False
+        if budget_ms is not None:
+            budget_ns = int(budget_ms * 1000000)
+            if max_simulations is None:
+                max_simulations = EXACT_PRECISION
+            backend_budget = (self.backend is not None and opponent_ranges is None
+                              and not self.uses_reduced_sampler(board, num_opponents))
+            if backend_budget:
+                throughput = self.backend_throughput
+                if batch_size is None:
+                    batch_size = max_simulations
+            elif batch_size is None:
+                batch_size = throughput.trials_for(street, num_opponents, min(BUDGET_BATCH_NS, budget_ns))
+        compiled = None
+        if opponent_ranges is not None:
+            # Ranges need Monte Carlo: no preflop table or enumeration
+            compiled = self.compile_ranges(opponent_ranges, num_opponents)
+            exact = False
+        elif self.uses_preflop_table(player, board, num_opponents):
+            yield self.direct_win_probability(player, board, num_opponents), 0.0, 0
+            return
+        # A run stopped by target_width is as good as the query asks for, so
+        # it counts as the trials a worst-case (50%) run needs for that width
+        wanted = max_simulations
+        if target_width is not None:
+            wanted = min(wanted, int((z / target_width) ** 2 / 4) + 1)
+        if budget_ns is not None:
+            # Likewise for a result with as many trials as the budget should allow
+            wanted = min(wanted, throughput.trials_for(street, num_opponents, budget_ns))
+        key = None
+        if self.cache is not None or self.persistent_cache is not None:
+            if compiled is not None:
+                key = self.range_key(player, board, compiled)
+            else:
+                key = canonical_key(player, board, num_opponents)
+            win_prob = self.cache_get(key, EXACT_PRECISION if exact else wanted)
+            if win_prob is not None:
+                yield win_prob, 0.0, 0
+                return
+        
+        combinations = self.count_combinations(len(player) + len(board), len(board), num_opponents)
+        if exact is None:
+            exact = combinations <= exact_threshold
+        if exact:
+            win_prob = self.direct_win_probability(player, board, num_opponents, True)
+            if key is not None:
+                self.cache_put(key, win_prob, EXACT_PRECISION)
+            yield win_prob, 0.0, combinations
+            return
+        
+        if compiled is None and self.uses_reduced_sampler(board, num_opponents):
+            # Stream from one sampler so the strata cycle spans all batches
+            draws = self.reduced_draws(player, board, num_opponents)
+            batch_size = self.reduced_draw_count(num_opponents, batch_size)
+            max_simulations = self.reduced_draw_count(num_opponents, max_simulations)
+            total = 0.0
+            total_sq = 0.0
+            done = 0
+            spent = 0
+            while done < max_simulations:
+                if profiler is not None:
+                    start = profiler.clock()
+                batch = min(batch_size, max_simulations - done)
+                if budget_ns is not None:
+                    batch = min(batch, self.reduced_draw_count(num_opponents, throughput.trials_for(
+                        street, num_opponents, budget_ns - spent)))
+                    started = throughput.clock()
+                for _ in range(batch):
+                    value = next(draws)
+                    total += value
+                    total_sq += value * value
+                done += batch
+                if budget_ns is not None:
+                    spent += throughput.clock() - started
+                if profiler is not None:
+                    profiler.times['sampler'] += profiler.clock() - start
+                    profiler.counts['trials'] += batch
+                estimate = total / done
+                # Floor the variance so a run of identical samples doesn't look certain
+                variance = max(total_sq / done - estimate * estimate, 0.25 / (done + 1))
+                stderr = math.sqrt(variance / done)
+                stopped = target_width is not None and 2 * z * stderr < target_width
+                out_of_time = budget_ns is not None and spent >= budget_ns
+                if key is not None:
+                    self.cache_put(key, estimate, max(done, wanted) if stopped else done,
+                                   stopped or out_of_time or done >= max_simulations)
+                yield estimate, stderr, done
+                if stopped or out_of_time:
+                    return
+            return
+        
+        wins = 0
+        done = 0
+        spent = 0
+        while done < max_simulations:
+            batch = min(batch_size, max_simulations - done)
+            if budget_ns is not None:
+                # Shrink the last batches to what the model says still fits
+                if backend_budget:
+                    batch = min(batch, max(self.backend.min_batch, throughput.trials_for(
+                        street, num_opponents, (budget_ns - spent) // BUDGET_BACKEND_SHARE)))
+                else:
+                    batch = min(batch, throughput.trials_for(street, num_opponents, budget_ns - spent))
+                started = throughput.clock()
+            wins += self.simulate(player, board, num_opponents, batch, compiled)
+            done += batch
+            if budget_ns is not None:
+                elapsed = throughput.clock() - started
+                spent += elapsed
+                # Range sampling costs more per trial; only plain trials are modelled
+                if compiled is None:
+                    throughput.observe(street, num_opponents, batch, elapsed)
+            # Shrink towards 1/2 so a run of all wins or losses doesn't look certain
+            p = (wins + 1) / (done + 2)
+            stderr = math.sqrt(p * (1 - p) / done)
+            stopped = target_width is not None and 2 * z * stderr < target_width
+            out_of_time = budget_ns is not None and spent >= budget_ns
+            if key is not None:
+                self.cache_put(key, wins / done, max(done, wanted) if stopped else done,
+                               stopped or out_of_time or done >= max_simulations)
+            yield wins / done, stderr, done
+            if stopped or out_of_time:
+                return
+    
+    def simulate_ranges(self, player, board, opponent_ranges, simulations):
+        """
+        Monte Carlo trials with each opponent's hand drawn from their compiled
+        range. Raises ValueError when the ranges can't all be dealt around the
+        known cards.
+        """
+        import ranges
+        remaining_community = 5 - len(board)
+        dealer = Dealer(player + board, self.rng)
+        rng = self.rng
+        seats = len(opponent_ranges)
+        
+        # Known cards stay dead; opponents' cards are flagged for one trial
+        dead = bytearray(52)
+        for card in player + board:
+            dead[card] = 1
+        if not ranges.can_deal(opponent_ranges, dead):
+            texts = []
+            for hand_range in opponent_ranges:
+                if hand_range.text not in texts:
+                    texts.append(hand_range.text)
+            raise ValueError('%d opponents on %s cannot all be dealt around the known cards'
+                             % (seats, ' / '.join(texts)))
+        # Opponent hands are stored as indexes into their range's combo table
+        combos = [0] * seats
+        
+        evaluate_hole = self.evaluate_hole
+        community = self._community
+        summary = self._board_summary
+        for i in range(len(board)):
+            community[i] = board[i]
+        first = len(board)
+        card1 = player[0]
+        card2 = player[1]
+        
+        wins = 0
+        for _ in range(simulations):
+            dealer.reset()
+            seat = 0
+            redeals = 0
+            while seat < seats:
+                hand_range = opponent_ranges[seat]
+                combo = hand_range.sample(rng, dead)
+                if combo < 0:
+                    # Blocked by the seats before it: deal every opponent again
+                    redeals += 1
+                    if redeals > ranges.MAX_REDEALS:
+                        raise ValueError('range ' + hand_range.text + ' is blocked by the other hands')
+                    for earlier in range(seat):
+                        earlier_range = opponent_ranges[earlier]
+                        dead[earlier_range.cards[2 * combos[earlier]]] = 0
+                        dead[earlier_range.cards[2 * combos[earlier] + 1]] = 0
+                    dealer.reset()
+                    seat = 0
+                    continue
+                combos[seat] = combo
+                opponent1 = hand_range.cards[2 * combo]
+                opponent2 = hand_range.cards[2 * combo + 1]
+                dead[opponent1] = dead[opponent2] = 1
+                dealer.remove(opponent1)
+                dealer.remove(opponent2)
+                seat += 1
             
-            # Evaluate all hands
-            player_hand_value, player_hand_type = self.get_best_hand(player_hole_cards, final_community)
+            deck = dealer.deal_tracked(remaining_community)
+            for i in range(remaining_community):
+                community[first + i] = deck[i]
+            summarize_board(community, summary)
+            player_strength = evaluate_hole(summary, card1, card2)
             
-            # Check if player wins
+            # Every seat is visited to clear its dead flags, but scoring
+            # stops at the first winner
             player_wins = True
-            for opponent_hole in opponent_hands:
-                opponent_hand_value, opponent_hand_type = self.get_best_hand(opponent_hole, final_community)
-                if opponent_hand_value > player_hand_value:
+            for seat in range(seats):
+                hand_range = opponent_ranges[seat]
+                combo = combos[seat]
+                opponent1 = hand_range.cards[2 * combo]
+                opponent2 = hand_range.cards[2 * combo + 1]
+                dead[opponent1] = dead[opponent2] = 0
+                if player_wins and evaluate_hole(summary, opponent1, opponent2) > player_strength:
                     player_wins = False
-                    break
-            
             if player_wins:
                 wins += 1
         
-        return wins / simulations
+        return wins
+    
+    def uses_preflop_table(self, player, board, num_opponents):
+        """Whether the preflop table answers this query"""
+        return not board and self.preflop and len(player) == 2 and 1 <= num_opponents <= PREFLOP_MAX_OPPONENTS
+    
+    def uses_reduced_sampler(self, board, num_opponents):
+        """
+        Whether Monte Carlo for this query goes through reduced_draws. Only the
+        turn and river gain from it; on the flop the runout dominates the variance.
+        """
+        return self.variance_reduction and num_opponents > 0 and len(board) >= 4
+    
+    def reduced_draws(self, player, board, num_opponents):
+        """
+        Endless variance-reduced samples of the win probability for integer
+        cards on the turn or river. On the turn the river card is stratified:
+        each remaining card is used equally often, visited in a shuffled cycle.
+        Each draw then deals m disjoint opponent holdings and scores every
+        holding once; the sample is the chance that num_opponents of those m
+        holdings picked at random contain no winner, which reuses each
+        evaluation across seats.
+        """
+        rng = self.rng
+        dealer = Dealer(player + board, rng)
+        deck = dealer.deck
+        evaluate_hole = self.evaluate_hole
+        hands = REDUCED_HANDS
+        total_sets = choose(hands, num_opponents)
+        
+        # The board only changes with the river stratum, so it is summarized
+        # once per stratum and every holding is a two-card increment
+        community = [0] * 5
+        summary = [0] * 7
+        for i in range(len(board)):
+            community[i] = board[i]
+        card1 = player[0]
+        card2 = player[1]
+        
+        strata = list(deck) if len(board) == 4 else [None]
+        size = dealer.size
+        while True:
+            # Shuffle the order in which the strata are visited
+            for i in range(len(strata) - 1, 0, -1):
+                j = rng.randrange(i + 1)
+                strata[i], strata[j] = strata[j], strata[i]
+            
+            for river in strata:
+                # Park the river card at the end of the deck, out of the deal
+                available = size
+                if river is not None:
+                    for i in range(size):
+                        if deck[i] == river:
+                            deck[i] = deck[size - 1]
+                            deck[size - 1] = river
+                            break
+                    available = size - 1
+                    community[4] = river
+                summarize_board(community, summary)
+                player_strength = evaluate_hole(summary, card1, card2)
+                
+                # Partial Fisher-Yates shuffle dealing consecutive pairs
+                beaten_by = 0
+                for i in range(0, 2 * hands, 2):
+                    j = i + rng.randrange(available - i)
+                    deck[i], deck[j] = deck[j], deck[i]
+                    j = i + 1 + rng.randrange(available - i - 1)
+                    deck[i + 1], deck[j] = deck[j], deck[i + 1]
+                    if evaluate_hole(summary, deck[i], deck[i + 1]) > player_strength:
+                        beaten_by += 1
+                yield choose(hands - beaten_by, num_opponents) / total_sets
+    
+    def reduced_draw_count(self, num_opponents, simulations):
+        """Draws of reduced_draws costing about as many evaluations as plain trials"""
+        return max(1, simulations * (num_opponents + 1) // (REDUCED_HANDS + 1))
+    
+    def simulate_reduced(self, player, board, num_opponents, simulations):
+        """Like simulate, but estimated with reduced_draws for the same evaluation budget"""
+        draws = self.reduced_draws(player, board, num_opponents)
+        count = self.reduced_draw_count(num_opponents, simulations)
+        total = 0.0
+        for _ in range(count):
+            total += next(draws)
+        return total / count * simulations
+    
+    def calculate_outs(self, player_hole_cards, community_cards, num_opponents=1, simulations=1000,
+                       exact=None, exact_threshold=EXACT_THRESHOLD):
+        """
+        Win probability for every possible next card on the flop or turn.
+        Returns (equities, improving, equity): equities maps each card that
+        can come next (e.g. 'h10') to the win probability once it's dealt,
+        improving counts the cards that raise the win probability above
+        equity, the win probability now. Everything comes from one shared
+        pass: exact enumeration grouped by next card, or Monte Carlo trials
+        that score all next cards against the same opponent hands.
+        """
+        player = cards_to_ints(player_hole_cards)
+        board = cards_to_ints(community_cards)
+        if len(board) not in (3, 4):
+            raise ValueError('outs need a flop or a turn')
+        
+        if exact is None:
+            combinations = self.count_combinations(len(player) + len(board), len(board), num_opponents)
+            exact = combinations <= exact_threshold
+        if exact:
+            wins, totals = self.enumerate_outs(player, board, num_opponents)
+        else:
+            wins, totals = self.simulate_outs(player, board, num_opponents, simulations)
+        
+        # Every next card is equally likely, so equity is the mean over cards
+        sum_equity = 0
+        count = 0
+        for card in range(52):
+            if totals[card]:
+                sum_equity += wins[card] / totals[card]
+                count += 1
+        equity = sum_equity / count
+        
+        equities = {}
+        improving = 0
+        for card in self.create_int_deck(player + board):
+            card_equity = wins[card] / totals[card] if totals[card] else equity
+            equities[int_to_card(card)] = card_equity
+            if card_equity > equity:
+                improving += 1
+        return equities, improving, equity
+    
+    def enumerate_outs(self, player, board, num_opponents=1):
+        """
+        Exact (wins, totals) per next card for integer cards on the flop or
+        turn, as lists indexed by card, from a single enumeration
+        """
+        wins = [0] * 52
+        totals = [0] * 52
+        for runout, runout_wins, runout_total in self.enumerate_runouts(player, board, num_opponents):
+            # Either card of a two-card runout can come first
+            for card in runout:
+                wins[card] += runout_wins
+                totals[card] += runout_total
+        return wins, totals
+    
+    def simulate_outs(self, player, board, num_opponents, simulations):
+        """
+        Monte Carlo (wins, trials) per next card for integer cards on the
+        flop or turn. Each trial deals the opponents (and the river after a
+        flop) once and scores every next card they leave in the deck, which
+        samples each next card with the rest dealt uniformly around it.
+        """
+        dealer = Dealer(player + board, self.rng)
+        next_cards = list(dealer.deck)
+        runout_start = 2 * num_opponents
+        rivers = 4 - len(board)
+        dealt = runout_start + rivers
+        if dealt + 1 > dealer.size:
+            raise ValueError('not enough cards left for %d opponents' % num_opponents)
+        evaluate_hole = self.evaluate_hole
+        
+        community = self._community
+        summary = self._board_summary
+        for i in range(len(board)):
+            community[i] = board[i]
+        next_slot = len(board)
+        card1 = player[0]
+        card2 = player[1]
+        
+        wins = [0] * 52
+        trials = [0] * 52
+        dealt_flags = bytearray(52)
+        for _ in range(simulations):
+            deck = dealer.deal(dealt)
+            for i in range(dealt):
+                dealt_flags[deck[i]] = 1
+            if rivers:
+                community[4] = deck[runout_start]
+            
+            for card in next_cards:
+                if dealt_flags[card]:
+                    continue
+                community[next_slot] = card
+                summarize_board(community, summary)
+                player_strength = evaluate_hole(summary, card1, card2)
+                for i in range(0, runout_start, 2):
+                    if evaluate_hole(summary, deck[i], deck[i + 1]) > player_strength:
+                        break
+                else:
+                    wins[card] += 1
+                trials[card] += 1
+            
+            for i in range(dealt):
+                dealt_flags[deck[i]] = 0
+        
+        return wins, trials
+    
+    def preflop_win_probability(self, player, num_opponents):
+        """Precomputed win probability for two integer hole cards and no board"""
+        if self._preflop_equity is None:
+            import preflop_table
+            self._preflop_equity = preflop_table.EQUITY
+        table = self._preflop_equity
+        i = 2 * (preflop_index(player[0], player[1]) * PREFLOP_MAX_OPPONENTS + num_opponents - 1)
+        return (table[i] | (table[i + 1] << 8)) / 65535
+    
+    def enumerate_win_probability(self, player, board, num_opponents=1):
+        """
+        Exact probability that no opponent beats player (integer cards), found by
+        enumerating every runout and every set of opponent holdings
+        """
+        wins = 0
+        total = 0
+        for runout, runout_wins, runout_total in self.enumerate_runouts(player, board, num_opponents):
+            wins += runout_wins
+            total += runout_total
+        return wins / total
+    
+    def enumerate_runouts(self, player, board, num_opponents=1):
+        """
+        For every runout of the board (integer cards), yield (runout, wins,
+        total): the number of opponent holding sets that don't beat player
+        out of all of them
+        """
+        deck = self.create_int_deck(player + board)
+        evaluate_hole = self.evaluate_hole
+        summary = [0] * 7
+        
+        for runout in self.get_all_combinations(deck, 5 - len(board)):
+            summarize_board(board + runout, summary)
+            player_strength = evaluate_hole(summary, player[0], player[1])
+            rest = [card for card in deck if card not in runout]
+            
+            # Holdings that don't beat the player, as card bitmasks
+            losing_hands = []
+            for i in range(len(rest) - 1):
+                card1 = rest[i]
+                for card2 in rest[i + 1:]:
+                    if evaluate_hole(summary, card1, card2) <= player_strength:
+                        losing_hands.append((1 << card1) | (1 << card2))
+            
+            if num_opponents > 0:
+                wins = _count_disjoint(losing_hands, 0, num_opponents, 0)
+            else:
+                wins = 1
+            yield runout, wins, holding_sets(len(rest), num_opponents)
     
     def format_cards(self, cards):
         """Format cards for display"""
@@ -197,4 +2143,46 @@ if __name__ == "__main__":
     
     # Calculate win probability against 3 opponents
     win_prob_3 = calc.calculate_win_probability(player_cards, community_cards, num_opponents=3, simulations=100)
-    print(f"Win probability vs 3 opponents: {win_prob_3:.1%}") 
\ No newline at end of file
+    print(f"Win probability vs 3 opponents: {win_prob_3:.1%}") 
+    
+    # As many trials as fit in 150ms
+    win_prob, trials = calc.budget_win_probability(player_cards, community_cards, num_opponents=3, budget_ms=150)
+    print(f"Win probability vs 3 opponents in 150ms: {win_prob:.1%} ({trials} trials)")
+    
+    # Win probability for every possible turn card
+    equities, improving, equity = calc.calculate_outs(player_cards, community_cards, num_opponents=1, simulations=200)
+    best = max(equities, key=equities.get)
+    print(f"Turn cards that improve on {equity:.1%}: {improving} of {len(equities)} (best: {best} at {equities[best]:.1%})")
+    
+    # Dealing and scoring reuse buffers, so trials shouldn't allocate.
+    # Compare a short and a long run so per-query setup cancels out.
+    player_ints = cards_to_ints(player_cards)
+    board_ints = cards_to_ints(community_cards)
+    calc = PokerCalculator(backend=None, cache_size=0)
+    calc.simulate(player_ints, board_ints, 3, 10)
+    try:
+        import tracemalloc
+        tracemalloc.start()
+        calc.simulate(player_ints, board_ints, 3, 10)
+        short_run = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        calc.simulate(player_ints, board_ints, 3, 1010)
+        long_run = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    except ImportError:
+        import gc
+        gc.collect()
+        gc.disable()
+        free = gc.mem_free()
+        calc.simulate(player_ints, board_ints, 3, 10)
+        short_run = free - gc.mem_free()
+        free = gc.mem_free()
+        calc.simulate(player_ints, board_ints, 3, 1010)
+        long_run = free - gc.mem_free()
+        gc.enable()
+    bytes_per_trial = (long_run - short_run) / 1000
+    print(f"Bytes allocated per trial: {bytes_per_trial:.2f}")
+    # More than a byte per trial means something in the trial loop allocates
+    if bytes_per_trial > 1:
+        import sys
+        sys.exit("allocation check failed")
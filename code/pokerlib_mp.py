@@ -0,0 +1,89 @@
+"""
+Multi-process equity engine for large simulation counts (desktop hosts only).
+
+Trials are split into fixed-size work units, each with its own RNG stream
+split in job order from pokerlib.XorShift(seed), and the win counts are
+summed in unit order. The split doesn't depend on the number of workers, so a given seed
+gives the same result on any machine with the same backend.
+
+    import pokerlib_mp
+    pokerlib_mp.calculate_win_probability(['hA', 'dA'], ['h7', 'd8', 'c9'], 3, 1000000, seed=1)
+    pokerlib_mp.batch_win_probability([(['hA', 'dA'], [], 3), (['s10', 'c10'], ['h7', 'd8', 'c9'], 1)], 100000)
+"""
+from multiprocessing import Pool
+
+import pokerlib
+
+# Trials per work unit
+UNIT_TRIALS = 50000
+
+_calculator = None
+
+
+def _worker_calculator():
+    global _calculator
+    if _calculator is None:
+        _calculator = pokerlib.PokerCalculator()
+    return _calculator
+
+
+def _seed_unit(calc, seed, scenario, unit, stream):
+    """Give calc independent RNG streams for one work unit"""
+    calc.rng.setstate(stream)
+    if calc.backend is not None and hasattr(calc.backend, 'rng'):
+        import numpy as np
+        calc.backend.rng = np.random.default_rng(np.random.SeedSequence([seed, scenario, unit]))
+
+
+def _run_unit(job):
+    player, board, num_opponents, trials, seed, scenario, unit, stream = job
+    calc = _worker_calculator()
+    _seed_unit(calc, seed, scenario, unit, stream)
+    return calc.simulate(player, board, num_opponents, trials)
+
+
+def batch_win_probability(scenarios, simulations=100000, seed=0, workers=None, exact=None,
+                          exact_threshold=pokerlib.EXACT_THRESHOLD, pool=None):
+    """
+    Win probabilities for a list of (hole_cards, community_cards, num_opponents)
+    scenarios, in the same order. Preflop and exact answers are computed
+    directly; the rest run as Monte Carlo units spread over a process pool
+    (pass pool to reuse one).
+    """
+    calc = pokerlib.PokerCalculator()
+    streams = pokerlib.XorShift(seed)
+    results = [None] * len(scenarios)
+    jobs = []
+    owners = []
+    for scenario, (hole_cards, community_cards, num_opponents) in enumerate(scenarios):
+        player = pokerlib.cards_to_ints(hole_cards)
+        board = pokerlib.cards_to_ints(community_cards)
+        results[scenario] = calc.direct_win_probability(player, board, num_opponents, exact, exact_threshold)
+        if results[scenario] is not None:
+            continue
+        results[scenario] = 0
+        for unit, start in enumerate(range(0, simulations, UNIT_TRIALS)):
+            trials = min(UNIT_TRIALS, simulations - start)
+            stream = streams.split().getstate()
+            jobs.append((player, board, num_opponents, trials, seed, scenario, unit, stream))
+            owners.append(scenario)
+
+    if jobs:
+        if pool is None:
+            with Pool(workers) as own_pool:
+                counts = own_pool.map(_run_unit, jobs, chunksize=1)
+        else:
+            counts = pool.map(_run_unit, jobs, chunksize=1)
+        for scenario, wins in zip(owners, counts):
+            results[scenario] += wins
+        for scenario in set(owners):
+            results[scenario] /= simulations
+    return results
+
+
+def calculate_win_probability(player_hole_cards, community_cards, num_opponents=1, simulations=1000000,
+                              seed=0, workers=None, exact=None, exact_threshold=pokerlib.EXACT_THRESHOLD,
+                              pool=None):
+    """Parallel PokerCalculator.calculate_win_probability, reproducible for a given seed"""
+    return batch_win_probability([(player_hole_cards, community_cards, num_opponents)], simulations, seed,
+                                 workers, exact, exact_threshold, pool)[0]
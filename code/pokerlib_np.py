@@ -0,0 +1,180 @@
+"""
+NumPy backend for pokerlib's Monte Carlo simulation (desktop hosts only).
+
+Deals thousands of trials at once as integer arrays, scores every hand with
+vectorized lookups into evaltables.bin and reduces to a win count.
+PokerCalculator picks it up automatically when NumPy can be imported.
+
+Each card maps to an additive 64-bit code, so the code of a hand is the sum
+of its cards' codes and the shared board is summed once per trial:
+    bits 0-13   base-5 rank counts of ranks 2-7
+    bits 14-30  base-5 rank counts of ranks 8-A
+    bits 31-33  number of cards ranked 8-A
+    bits 34-49  4-bit card count per suit
+The multiset index pokerlib.multiset_index computes is then split into two
+direct lookups: one on the high ranks, one on the low ranks given how many
+cards the high ranks used.
+"""
+import numpy as np
+
+import pokerlib
+
+# Trials dealt per array batch; bounds memory to a few tens of MB
+CHUNK = 50000
+# Smaller requests are cheaper in the pure Python loop
+MIN_BATCH = 256
+
+LOW_RANKS = 6
+_LOW_KEYS = 5 ** LOW_RANKS
+_HIGH_KEYS = 5 ** (13 - LOW_RANKS)
+_RANK_BITS = 1 << np.arange(13, dtype=np.int64)
+
+
+def _card_codes():
+    codes = np.zeros(52, dtype=np.int64)
+    for card in range(52):
+        rank = card >> 2
+        if rank < LOW_RANKS:
+            code = 5 ** rank
+        else:
+            code = (5 ** (rank - LOW_RANKS) << 14) | (1 << 31)
+        codes[card] = code | (1 << (34 + 4 * (card & 3)))
+    return codes
+
+
+def _split_index_tables(offsets):
+    """Direct tables for the high-rank and low-rank parts of multiset_index"""
+    keys = np.arange(_HIGH_KEYS)
+    high = np.zeros(_HIGH_KEYS, dtype=np.int64)
+    rem = np.full(_HIGH_KEYS, 7)
+    for rank in range(12, LOW_RANKS - 1, -1):
+        count = (keys // 5 ** (rank - LOW_RANKS)) % 5
+        # Keys holding more than 7 cards never occur; clip to stay in range
+        high += offsets[(rank * 8 + np.clip(rem, 0, 7)) * 5 + np.minimum(count, np.clip(rem, 0, 4))]
+        rem -= count
+
+    keys = np.arange(_LOW_KEYS)
+    low = np.zeros((8, _LOW_KEYS), dtype=np.int64)
+    for start in range(8):
+        rem = np.full(_LOW_KEYS, start)
+        for rank in range(LOW_RANKS - 1, -1, -1):
+            count = (keys // 5 ** rank) % 5
+            low[start] += offsets[(rank * 8 + np.clip(rem, 0, 7)) * 5 + np.minimum(count, np.clip(rem, 0, 4))]
+            rem -= count
+    return high, low.ravel()
+
+
+class NumpyBackend:
+    def __init__(self, tables_path=None, seed=None, chunk=CHUNK):
+        self.tables_path = tables_path or pokerlib._default_tables_path()
+        self.seed(seed)
+        self.chunk = chunk
+        self.min_batch = MIN_BATCH
+        self._flush = None
+
+    def seed(self, seed=None):
+        """Restart the random stream from seed (None for a fresh one)"""
+        self.rng = np.random.default_rng(seed)
+
+    def load(self):
+        """Read the lookup tables into arrays"""
+        if self._flush is not None:
+            return
+        with open(self.tables_path, 'rb') as f:
+            header = f.read(pokerlib.TABLES_HEADER_SIZE)
+            if header[:4] != pokerlib.TABLES_MAGIC:
+                raise ValueError('bad evaluator table file: ' + self.tables_path)
+            data = np.frombuffer(f.read(), dtype='<u4').astype(np.int64)
+        paired_start = pokerlib.FLUSH_TABLE_SIZE + pokerlib.UNIQUE_TABLE_SIZE
+        self._paired = data[paired_start:]
+        pokerlib._build_multiset_offsets()
+        self._high, self._low = _split_index_tables(np.array(pokerlib._MULTISET_OFFSETS, dtype=np.int64))
+        self._codes = _card_codes()
+        self._flush = data[:pokerlib.FLUSH_TABLE_SIZE]
+
+    def _strengths(self, codes, cards_for_rows):
+        """
+        Strengths for summed 7-card codes. cards_for_rows(rows) must return the
+        (len(rows), 7) cards of the given flat rows; it is only called for flushes.
+        """
+        shape = codes.shape
+        codes = codes.ravel()
+        high_cards = (codes >> 31) & 7
+        index = self._high[(codes >> 14) & 0x1FFFF] + self._low[(7 - high_cards) * _LOW_KEYS + (codes & 0x3FFF)]
+        strengths = self._paired[index]
+
+        # Flushes are rare, so only build suit masks for those rows
+        flush_rows = np.flatnonzero((((codes >> 34) & 0xFFFF) + 0x3333) & 0x8888)
+        if len(flush_rows):
+            cards = cards_for_rows(flush_rows)
+            suits = cards & 3
+            suit_counts = (suits[:, :, None] == np.arange(4)).sum(axis=1)
+            in_suit = suits == suit_counts.argmax(axis=1)[:, None]
+            flush_mask = (_RANK_BITS[cards >> 2] * in_suit).sum(axis=1)
+            strengths[flush_rows] = self._flush[flush_mask]
+        return strengths.reshape(shape)
+
+    def evaluate(self, cards):
+        """Strengths for an (N, 7) integer card array, same scale as evaluate_ints"""
+        self.load()
+        return self._strengths(self._codes[cards].sum(axis=1), lambda rows: cards[rows])
+
+    def deal(self, deck, trials, count):
+        """
+        Partial Fisher-Yates shuffle of one copy of deck per trial, vectorized
+        across trials; returns a (trials, count) array of dealt cards
+        """
+        cards = np.tile(deck, (trials, 1))
+        rows = np.arange(trials)
+        size = len(deck)
+        for i in range(count):
+            j = i + self.rng.integers(0, size - i, trials)
+            swapped = cards[rows, j]
+            cards[rows, j] = cards[:, i]
+            cards[:, i] = swapped
+        return cards[:, :count]
+
+    def simulate(self, player, board, num_opponents, simulations):
+        """Run Monte Carlo trials for integer cards and return how many the player won"""
+        self.load()
+        known = set(player) | set(board)
+        deck = np.array([c for c in range(52) if c not in known], dtype=np.int64)
+        to_deal = 2 * num_opponents + 5 - len(board)
+        codes = self._codes
+        board_code = codes[board].sum() if board else 0
+        player_code = codes[player].sum()
+        wins = 0
+        done = 0
+        while done < simulations:
+            trials = min(self.chunk, simulations - done)
+            dealt = self.deal(deck, trials, to_deal)
+            runout = dealt[:, 2 * num_opponents:]
+            holes = dealt[:, :2 * num_opponents].reshape(trials, num_opponents, 2)
+
+            # Sum the shared board once per trial, then add each player's hole cards
+            trial_board = board_code + codes[runout].sum(axis=1)
+            hand_codes = np.empty((trials, num_opponents + 1), dtype=np.int64)
+            hand_codes[:, 0] = player_code
+            hand_codes[:, 1:] = codes[holes].sum(axis=2)
+            hand_codes += trial_board[:, None]
+
+            def cards_for_rows(rows):
+                trial = rows // (num_opponents + 1)
+                seat = rows % (num_opponents + 1)
+                hole = np.empty((len(rows), 2), dtype=np.int64)
+                hole[:] = player
+                opponent = seat > 0
+                hole[opponent] = holes[trial[opponent], seat[opponent] - 1]
+                full_board = np.empty((len(rows), 5), dtype=np.int64)
+                full_board[:, :len(board)] = board
+                full_board[:, len(board):] = runout[trial]
+                return np.concatenate((hole, full_board), axis=1)
+
+            strengths = self._strengths(hand_codes, cards_for_rows)
+            # Ties count as a win, like the pure Python loop
+            if num_opponents:
+                wins += int((strengths[:, 1:].max(axis=1) <= strengths[:, 0]).sum())
+            else:
+                wins += trials
+            done += trials
+        return wins
@@ -0,0 +1,103 @@
+# Generated by gen_preflop.py - do not edit.
+# Win probability for the 169 starting hands x 1-9 opponents,
+# 2000000 samples per entry, stored as little-endian u16 (x / 65535).
+# Entry (hand_index * 9 + num_opponents - 1); see pokerlib.preflop_index.
+SAMPLES = 2000000
+EQUITY = (
+    b'(\x83NP\xa29\x9b.\xa4(\x06%\x97"\xa2 +\x1fmZR7v\'\xbf\x1ew\x19\x19\x16\x95\x13'
+    b'\xb3\x11I\x10\xc9\\\xb19\x94)\xcd F\x1b\xc8\x17X\x15Y\x13\xba\x11\xb3_\xed;\x8a+I"\xad\x1c'
+    b'\x03\x19`\x16J\x14\xbf\x12\xf8^\xfe9{)+ \x80\x1a\x87\x16\xec\x13\xe3\x11L\x10\x05`s9g('
+    b'\x15\x1f4\x19e\x15\xba\x12\x95\x10\xf6\x0eGe\x07=\xef*\xf3 \xc1\x1a\x91\x16q\x136\x11~\x0f\xc5j'
+    b' @u-\x12#A\x1c\xc7\x17\x92\x14.\x12@\x10\xf2p\xc9D\xf50\n&\xf2\x1eJ\x1a\xc7\x16R\x14'
+    b':\x12dw\x19I%4l(\x0f!\xea\x1b;\x18a\x15\x14\x13\xae~\xa7NW8\xd5+\xd2#p\x1e'
+    b"S\x1a0\x17\xa2\x14\xa1\x86\x83U\x83=20\xac'\xb5!?\x1d\xba\x19\xf9\x16\xc8\x91\xfa_\x8fF\x118"
+    b's.\xcb\'\x9e"\xc5\x1ej\x1b\xa4c\x87A\xf91W)\xc5#; p\x1d:\x1bh\x19\x9c\x8b\xf7W'
+    b'\xd7>\xfe1\xba*Q&h#+!q\x1f\xdfa\xa9>\x02.\x81$\xac\x1e\xc4\x1a\xe9\x17\xf5\x157\x14'
+    b'\xd1d\x17A60\x82&\x9f z\x1c\xbf\x19\x9c\x17\xd3\x15)dT?:.O$E\x1e5\x1a+\x17'
+    b'\x0e\x15P\x13\x08e\xaa>8-\'#\xcc\x1c~\x18\xa1\x15F\x13\x89\x11\xe6fp>t,7"\xc8\x1b'
+    b'g\x17U\x14\x06\x12E\x10\x1emyB`/}$\xab\x1d\xdd\x18_\x15\xf7\x12\xf0\x10bs\xf3F\xcc2'
+    b'v\'I k\x1b\xc7\x17\xfe\x14\xe5\x12\xb2yLK)6\x05*Z"\r\x1d(\x191\x16\xc5\x13\x08\x81'
+    b'\xf6P.:k-\x1e%\x8e\x1f*\x1b\xe1\x17Y\x15\xfc\x88\xc1W\x9c?\xd21\x06)\xc5"4\x1e\xa6\x1a'
+    b'\xb5\x17!\x94qb\x12I\x18:F0U)<$\x19 \xc6\x1c\xbfe\xbdC\x0f4\x19+\xb1%\xd1!'
+    b'\xe7\x1e\xa5\x1c\xd5\x1aLjnH*8\x98.\xa1(\xa4$\x8a!,\x1f@\x1d\t\x94\xbf_\xcbD\x166'
+    b'n-\x17(\xa2$\x19"2 oi)F\xcb4\x84*\x01$\x99\x1fd\x1c;\x1aJ\x18%i\x7fD'
+    b'\x033\x9e(2"\xae\x1d\x9c\x1aF\x18c\x16:j\xcfC\xfc1x\'\xcc +\x1c\xf6\x18n\x16v\x14'
+    b'\xfbk\xc2C\x1c1v&~\x1f\xd3\x1aQ\x17\xdd\x14\xef\x12\xc4n(D\xc20\xb4%\xd1\x1e\xe6\x19x\x16'
+    b'\xb3\x13\xe6\x11\xa8u2I\xc24 )\xb3!\x88\x1c\xc0\x18\xed\x15\xb5\x13\x04|\xceM\x178\xad+\xc8#'
+    b'+\x1e0\x1a\x0f\x17\xb8\x14l\x83bS)<$/\x8e&\xbe \x16\x1c\xd1\x18*\x16h\x8b\x12Z\x9aA'
+    b'\x993T*\r$;\x1f\x80\x1b\x89\x18R\x96\x0be!K\xea;\xdd1\xd5*c%6!\xb8\x1d\x85h'
+    b'\xe7E\xd85\xac,\xd1&\xdf"& \x93\x1d\xcc\x1b+m\xc1JA:\x9b0T*G&\x10#\xb9 '
+    b'\x9d\x1e\x92qhOV>\x144\x8a-\x17)\xcc%\x18#\x10!D\x9cIh^K\xe8:\xa60c*'
+    b'X&$#\xe7 \xa3mqIn7\x86,\xaf%\xe7 \x89\x1d\xf8\x1a\xe9\x18\xe3n9I\xb86\xc9+'
+    b'\xb3$\xb7\x1fl\x1c\xb6\x19\xcb\x17\xe5p\xe3H\xfe5\xcf*\x80#X\x1e\xc8\x1a(\x18\n\x16\xafsVI'
+    b'\xc35\x06*\x8c"?\x1d\x89\x19\xbb\x16q\x14Jw\xb4JG6s*\xdb"\x92\x1d\xb8\x19\xce\x16\xa2\x14'
+    b'\xad~\xe8O\x1f:o-$%\x81\x1f9\x1b\x02\x18\x8c\x15\xd6\x85\xb2U\\>\xea0\x15(\xd8!z\x1d'
+    b'\xc7\x19%\x17\x9a\x8d\x96\\\xd7Ce5\xf7+I%Y x\x1cZ\x19\xad\x98\x94gwM\xd4=\xc03'
+    b'O,\xb0&6"\xc0\x1e\x9agCD\xef3\x8d*\xcd$\xc1 \xc2\x1du\x1b\x9a\x19\x89l"I`8'
+    b"\xa8.[(\x00$\xf2 L\x1eY\x1c8q\xdbM\xd6<\x822\xf3+{'\xf8#}!=\x1f{u"
+    b'wR\xec@96L/i*\xa1&\xf6#\xaf!u\xa3\xfbo\x02R\xea?\x9b4o-|(/%'
+    b'\x9d"\x02s\xe9M ;\x8b/\xf6\'\xaf"\xc8\x1e\x03\x1c\xf4\x197u\xd9M\xaf:\x03/U\'\xdc!'
+    b'\xe7\x1d\x05\x1b\xc9\x18\xfaw]ND:u.S&\xda \xc1\x1c\x9c\x19K\x17\x9a{\xc6O\xdb:\xb4.'
+    b'\x85&\xd1 \xa3\x1c\x80\x19\xfa\x16\xe9\x7f\x88Q\x91;\x8a.(&= \xf8\x1b\x93\x180\x16\xd0\x87\xf2W'
+    b':@a2z)\xf3":\x1e\x8a\x1a\xb7\x17\xd4\x8f\xb9^\x93E!7p-\x94&[!A\x1d\x18\x1a'
+    b'Y\x98df\xdcK.<\xb61B*\xd9$\x9f \x01\x1djh\xaeC#3\xb1)\xab#\xc4\x1f\x91\x1c'
+    b'Y\x1as\x18\x86msHD7\x7f-\x11\'\x95"~\x1f\xe6\x1c\xcc\x1aNrnM\xf3;r1\xb0*'
+    b'\xf6%\x80"\xdd\x1f\xc4\x1d\xb2v+RN@\x895n.r)\xb0%\xe1"\x9c \xecz\xc0V\x94D'
+    b'\x059\x7f1#,\x1c(&%\x9a"\xe9\xaa9x\x9cY\xc7E59\xdf0A+B\'D$\x84y'
+    b'\xe3Ra?*3\xd9*\x03%\xb6 \x99\x1d\t\x1b=|MSy?\n3\x9c*t$\x02 \xd6\x1c'
+    b':\x1a\xf6\x7f\x13U"@D3\xc3*\xa0$\x10 \x9e\x1c\x01\x1aN\x84\xb0Vy@H3W*\xe4#'
+    b'0\x1f\x8d\x1b\xc0\x182\x89\xb8Y\xf0A\x174\xb1*\x17$Q\x1f\x8a\x1b}\x18\xf7\x919a\xe3G\x149'
+    b'\x07/\xe4\'x"V\x1e\xf4\x1a\xd3\x9a\xb6i\xc8N\xd7>\xb23\x10,?&\xbc!\xe2\x1d\xc3m\xdfF'
+    b'\xad5\xb9+c%\xef \x9a\x1d\x11\x1b\x04\x19@oVH\xd66\xd7,H&\xb9!a\x1e\xdf\x1b\xe4\x19'
+    b'\ttCM/;\x920\xbd)\xcc$6!x\x1eI\x1c\x7fx\x16R\xc3?\xc14g-2(\x87$'
+    b'w!\'\x1f\x9b|\xd5V\x0fD}8\x041^+[\'"$\xe0!m\x807[UHM<F4'
+    b'O.\xe7)\x7f&\xdc#<\xb2\x13\x81}a\xc2L\xb5>S5\xa2.\xd4)2&6\x80TXDD'
+    b"f7\x86.\xde',#\x7f\x1f\xab\x1c\x1d\x84GZ1EV8l/\xdc(\x0c$C W\x1d~\x88"
+    b'\xd9[\xc4E\x178\xe0.\r(\x07#*\x1f\xf7\x1b\x97\x8d\xef^HG\xf58N/5(\xd7"\xbe\x1e'
+    b'F\x1br\x93#c\x17J\xe6:\xa70\x82)\xe7#\x88\x1f\x03\x1c\x15\x9dNl\x85Q\x1dA\xdb5\xdd-'
+    b'\xd1\'\x03#\x18\x1f#s*J\xf37\xaf-\xf1&7"\xf3\x1eE\x1c\x18\x1a\xe7t\x19L\xab9\x1e/'
+    b"\x0e(.#\xaf\x1f\xfd\x1c\xaa\x1a\x99v\x9dM\n;;05)'$\x8c \xb1\x1dr\x1b\x06{uR"
+    b"\x99?&4\xa6,L'H#Z \x12\x1e7\x7fSW\xe2C\x0e8@0\x82*d&\x0b#\x92 "
+    b'E\x83\xd9[oHV<\xfc3\x12.{)\x00&`#\xdf\x86\xbd`\xf0Lk@d7/1O,'
+    b'\x9d(\xa2%M\xb9K\x8a\x7fj\xaeTzE\xc2:\xf12D-\t)=\x88\xaf_\xe6J\xa1=k4'
+    b"K-)(%$\xe0 v\x8c{aWK\x8f=\xe63\xbe,D'\x02#\xbc\x1f\xac\x91^d\xd9L"
+    b'g>A4\xcd,&\'\x9f"\n\x1f\xc2\x97\xaah\xb8OX@\xc95\xf8-\r(H#m\x1f\xe9\x9e'
+    b'\x8fn\x07T4C\x198\xec/\xb9)\xa9$\xb1 \xabx]N7;w0\x9c)\xd0$7!}\x1e'
+    b'&\x1c\xdbznP\x00=\xef1\xdb*\xc0%\xff!$\x1f\xc8\x1c7}\x97R\xc0>m3\x04,\xe1&'
+    b'\xd4"\n \x84\x1d\xb5~\x0cT5@\xab4\x08-\xc4\'\xcb#\xc7 O\x1e\xcf\x82\xa9X\x82D\x868'
+    b'\x890\xb0*r&9#\x89 \xaf\x86\x91]\x14I\xec<o43.\xcc)/&t#\x9d\x8aOb'
+    b']N\x85A\x9a832b-m)\x8e&\xac\x8engZS[F%=\x826"1\x10-\xe1)'
+    b'\xdf\xc0\x88\x94\xdetR^\x0bN\x08B\x0c9\x872}-!\x91\xd4g\x90R\xbcD\x10;q3\xc3-'
+    b'\x1f)u%E\x96\xa4j\x14T\x9eEn;\xa33\xa0-\xd4(\x01%"\x9c\x0fo\xc5V\x9fG\xe6<'
+    b'\xd14\x8b.\x9a)U%d\xa3Su\x1e[\xaeJ\x0b?\x966\xf7/\xa6*F&\xd4~\x90Rw>'
+    b'Y3\xe9+\xaf&\xbc"\xb6\x1fQ\x1d\x15\x81\xc7T|@\x954\xd4,\xb8\'\x8d#\x93 \xff\x1d5\x83'
+    b'\xe1V\x19B\x076H.\xb6(\x87$0!\xd4\x1e\x87\x85\x0cY\xdcC\xaf7l/\xd8)\x96%/"'
+    b's\x1f\xb6\x86{Z>E\xb68U0\x86*\x14&\xe1"  \xc4\x8a:_\xceI\xd2<\x0f4\xbd-'
+    b'+)]%w"\xb8\x8e@d\xb8NrAl8\xab1\x95,\xae(\x88%s\x923i\xd9ScF'
+    b'\x1a=\xff5\x9e0^,\xda(\xb6\x96#ouZ\x16MfC1<}6\xee1J.H\xc7\x8b\x9d'
+    b'\x0e\x7f\\hOW2JH@\xc08\xdb2\xe8\x97im\x1dW~H\x10>G6\xd3/\xc5*\x94&'
+    b"\xef\x9d\xc8q\xaeYwJ\x8b?l7\xd50v+0'Q\xa5\xf1w\x14^\xb7M\x0cBB9d2"
+    b'\xb8,;(\xbd\x85\x11X\x91B~6\x9f.*)\x0b%\xd6!#\x1f\xf3\x87<ZCD\x1e8\x000'
+    b'[*\xe4%\xa3"\xdb\x1f)\x8a\x88\\NFw9\x1c1C+\xcf&r#\x8f [\x8c\xab^\x06H'
+    b'(;H2^,\xd3\'L$a!N\x8eZ`\xf2I\x8d<\xc43t-\x99(\xe0$\x0c"\x9c\x8f'
+    b'\x1fbxK\xe7=\xd44[.\x8a)\xab%\xc7"z\x93\xf7fiPkB\xdb8\x0c2\xea,\xad('
+    b"l%Z\x97\x18l|UxG\x9b=R6\xc90*,\xb3(\xa5\x9b8r\x18\\'N\x11D\xb1<"
+    b"\xc26\xfa1'._\x9dst\xcf^\xdfP\xb3F\xbf>\x9f8\x923j/T\xcd<\xa7\xd3\x89Js"
+    b'\xe8amT\x93I\xef@\xf89\x06\xa0\x96tD]3NTC\xb7:\xfb3r.\xac)7\xa7\xecz'
+    b'faFQ\xc7E\xf2<\xac5\xea/\xf6*k\x8du^\xbeG\xfd:\x972\xb9,-(\xbb$\xdf!'
+    b'\x86\x8f\xa0`\xa7Ia<\xd63\xb8- )v%\x82"\x7f\x91\xd4b\x8cK\x01>*5\xd0.\x1f*'
+    b"l&?#\xb2\x93\x08eeM\xc9?\x7f6\xff/\x06+*'\x17$\x93\x95-gNO4A\xb17"
+    b"\x101\x03,\xf7'\xb3$\x9f\x97\x92i9Q\xaeB 9K2\x00-\xdf(g%\x1c\x99Gk\x03S"
+    b'\xa4D\xa5:\xab3".\xc3)\x81&\xe6\x9cVpqX\x7fII?\xbc7\x012S-\x8b)I\xa1'
+    b'ov\x1e_CP\xe1E8>\x148\xff2\x08/\x11\xa3\xd8x\xa8a\xdaR\x89Hx@\x10:\xbc4'
+    b'\x850\xbe\xa4d{\xdbdKV\x97KqC\xe2<-7\x8c2\x92\xd3G\xb1\x1f\x96d\x80\x04o\xba`'
+    b'\x17U~K\x96Cv\xa9!~\x8ce\x86U\x15J@A\r:\x194\xd2.\x97\x97\x99h^PyB'
+    b"\x829\xc02\xd3-\xac)p&\xc4\x99\xffj\xebRAD&;14,/,+\xb3'\x04\x9cpm"
+    b'\xc0T=F\x8e<\x9e5*0\x1a,\xc0(A\x9e\xa0o\x9dV\xe7G\xf6=\xc36Z12-\x96)'
+    b'\xc9\x9d\x84nIU@F\r<\x115\x88/j+#(@\xa0\x8fq\x03XWH#>\xa96\xec0'
+    b'\x81,\xe1(F\xa2\xdfs\x85Z\x9bJ\xfd?M8`2\x93-\xc5)\xc2\xa3\x1ev\xd2\\\xbfL\xffA'
+    b"\x08:\xf93\x0f/,+3\xa8\x18|2crSTH'@\xa99\x834.0\x00\xaa\xae~\x07f"
+    b'\x17V\xfdJ\xa6B\xd8;i6\n2\xd7\xabm\x813i}Y6N\x93E\xdb>"9>4\xdc\xad'
+    b'~\x84\xf2lw]IR\x8bI\xb2B\x88<\x9d7\xdc\xda\xe9\xbcB\xa4\xcf\x8f\xd8~\\p\xe0cUY'
+    b'3P'
+)
@@ -0,0 +1,242 @@
+"""
+Opponent hand ranges for pokerlib.
+
+A range is written in the usual shorthand, e.g. "22+,A2s+,KTo+,QJ:0.5", or
+as the top share of starting hands, e.g. "15%". Each range is compiled once
+into a flat table of two-card combos with cumulative integer weights, and
+the last MAX_COMPILED compiled ranges are cached by their text, so repeated
+queries reuse them.
+Sampling is a binary search over the weights; combos that collide with dead
+cards are rejected and redrawn. When an opponent's range is blocked by the
+hands dealt to the opponents before it, the caller deals them all again;
+can_deal() tells up front whether a full deal exists at all.
+"""
+from array import array
+from collections import OrderedDict
+
+import pokerlib
+
+RANK_CHARS = '23456789TJQKA'
+# Weights are stored as integers in thousandths
+WEIGHT_SCALE = 1000
+# Redraws allowed before a range is treated as blocked by dead cards
+MAX_REJECTIONS = 200
+# Fresh deals of every opponent allowed for one trial
+MAX_REDEALS = 1000
+
+# Compiled ranges kept, least recently used dropped first
+MAX_COMPILED = 64
+
+_compiled = OrderedDict()
+
+
+class CompiledRange:
+    """Flat combo table: cards[2 * i], cards[2 * i + 1] with cumulative weight cumulative[i]"""
+    def __init__(self, text, combos):
+        self.text = text
+        self.cards = bytearray(2 * len(combos))
+        self.cumulative = array('L', [0] * len(combos))
+        total = 0
+        for i, (card1, card2, weight) in enumerate(combos):
+            self.cards[2 * i] = card1
+            self.cards[2 * i + 1] = card2
+            total += weight
+            self.cumulative[i] = total
+        self.total = total
+
+    def __len__(self):
+        return len(self.cumulative)
+
+    def sample(self, rng, dead):
+        """
+        Index of a random combo, weighted, with neither card flagged in dead
+        (a bytearray of 52 flags), or -1 if none turns up
+        """
+        cards = self.cards
+        cumulative = self.cumulative
+        for _ in range(MAX_REJECTIONS):
+            target = rng.randrange(self.total)
+            low = 0
+            high = len(cumulative) - 1
+            while low < high:
+                mid = (low + high) >> 1
+                if cumulative[mid] > target:
+                    high = mid
+                else:
+                    low = mid + 1
+            if not dead[cards[2 * low]] and not dead[cards[2 * low + 1]]:
+                return low
+        return -1
+
+
+def can_deal(compiled_ranges, dead):
+    """
+    Whether every range in compiled_ranges can hold a combo at once, with no
+    card shared or flagged in dead (left as it was on return)
+    """
+    return _fill(compiled_ranges, 0, 0, dead)
+
+
+def _fill(compiled_ranges, seat, first, dead):
+    if seat == len(compiled_ranges):
+        return True
+    hand_range = compiled_ranges[seat]
+    cards = hand_range.cards
+    for i in range(first, len(hand_range)):
+        card1 = cards[2 * i]
+        card2 = cards[2 * i + 1]
+        if dead[card1] or dead[card2]:
+            continue
+        dead[card1] = dead[card2] = 1
+        # Seats with the same range are interchangeable: take their combos in order
+        following = 0
+        if seat + 1 < len(compiled_ranges) and compiled_ranges[seat + 1] is hand_range:
+            following = i + 1
+        found = _fill(compiled_ranges, seat + 1, following, dead)
+        dead[card1] = dead[card2] = 0
+        if found:
+            return True
+    return False
+
+
+def _rank(char):
+    index = RANK_CHARS.find(char.upper())
+    if index < 0:
+        raise ValueError('bad rank in range: ' + char)
+    return index
+
+
+def _class_combos(high, low, kind):
+    """Combos for one starting hand class; kind is 's', 'o' or '' for both"""
+    combos = []
+    for suit1 in range(4):
+        for suit2 in range(4):
+            if high == low:
+                if suit1 < suit2:
+                    combos.append((high * 4 + suit1, low * 4 + suit2))
+            elif (suit1 == suit2 and kind != 'o') or (suit1 != suit2 and kind != 's'):
+                combos.append((high * 4 + suit1, low * 4 + suit2))
+    return combos
+
+
+def _parse_hand(token):
+    """'AKs' -> (12, 11, 's'); ranks are ordered high first"""
+    token = token.replace('10', 'T')
+    if len(token) not in (2, 3) or (len(token) == 3 and token[2] not in 'so'):
+        raise ValueError('bad hand in range: ' + token)
+    high = _rank(token[0])
+    low = _rank(token[1])
+    if high < low:
+        high, low = low, high
+    kind = token[2] if len(token) == 3 else ''
+    if high == low and kind:
+        raise ValueError('pairs cannot be suited or offsuit: ' + token)
+    return high, low, kind
+
+
+def _expand(token):
+    """Starting hand classes (high, low, kind) for one comma-separated token"""
+    if token.endswith('+'):
+        high, low, kind = _parse_hand(token[:-1])
+        if high == low:
+            return [(rank, rank, '') for rank in range(low, 13)]
+        return [(high, kicker, kind) for kicker in range(low, high)]
+    if '-' in token:
+        first, last = token.split('-')
+        high1, low1, kind = _parse_hand(first)
+        high2, low2, kind2 = _parse_hand(last)
+        if kind != kind2:
+            raise ValueError('mixed suitedness in range: ' + token)
+        if high1 == low1 and high2 == low2:
+            return [(rank, rank, '') for rank in range(min(low1, low2), max(low1, low2) + 1)]
+        if high1 != high2:
+            raise ValueError('dash ranges need the same high card: ' + token)
+        return [(high1, kicker, kind) for kicker in range(min(low1, low2), max(low1, low2) + 1)]
+    return [_parse_hand(token)]
+
+
+def top_classes(percent):
+    """Starting hand classes making up the best percent of all 1326 combos, by heads-up equity"""
+    calc = pokerlib.PokerCalculator(backend=None, cache_size=0)
+    ranked = []
+    for index in range(169):
+        hole = pokerlib.cards_to_ints(pokerlib.preflop_example(index))
+        ranked.append((calc.preflop_win_probability(hole, 1), index))
+    ranked.sort(reverse=True)
+    classes = []
+    combos = 0
+    for _, index in ranked:
+        if combos >= percent * 1326 / 100:
+            break
+        a = index // 13
+        b = index % 13
+        if a == b:
+            classes.append((a, a, ''))
+            combos += 6
+        elif a > b:
+            classes.append((a, b, 's'))
+            combos += 4
+        else:
+            classes.append((b, a, 'o'))
+            combos += 12
+    return classes
+
+
+def parse_range(text):
+    """List of (card1, card2, weight) combos for a range string"""
+    weights = {}
+    text = text.strip()
+    if text.endswith('%'):
+        for hand_class in top_classes(float(text[:-1])):
+            for combo in _class_combos(*hand_class):
+                weights[combo] = WEIGHT_SCALE
+    else:
+        for token in text.split(','):
+            token = token.strip()
+            if not token:
+                continue
+            weight = WEIGHT_SCALE
+            if ':' in token:
+                token, share = token.split(':')
+                weight = int(round(float(share) * WEIGHT_SCALE))
+            for hand_class in _expand(token):
+                for combo in _class_combos(*hand_class):
+                    weights[combo] = weight
+    combos = [(card1, card2, weight) for (card1, card2), weight in weights.items() if weight > 0]
+    if not combos:
+        raise ValueError('empty range: ' + text)
+    combos.sort()
+    return combos
+
+
+def compile_range(spec):
+    """CompiledRange for a range string (cached) or an already compiled range"""
+    if isinstance(spec, CompiledRange):
+        return spec
+    compiled = _compiled.pop(spec, None)
+    if compiled is None:
+        compiled = CompiledRange(spec, parse_range(spec))
+    _compiled[spec] = compiled
+    if len(_compiled) > MAX_COMPILED:
+        del _compiled[next(iter(_compiled))]
+    return compiled
+
+
+if __name__ == "__main__":
+    # Seats that block each other must be dealt again, not fail: with the
+    # hero on dAsA, two AA,A2s opponents fit only as hAcA or hA2h and cA2c
+    calc = pokerlib.PokerCalculator(backend=None, cache_size=0)
+    hero = pokerlib.cards_to_ints(['dA', 'sA'])
+    flop = pokerlib.cards_to_ints(['h7', 'd8', 'c9'])
+    for seed in range(5):
+        calc.rng = pokerlib.XorShift(seed)
+        compiled = calc.compile_ranges('AA,A2s', 2)
+        win_prob = calc.simulate(hero, flop, 2, 200, compiled) / 200
+        print(f"dA sA | h7 d8 c9 vs 2 on AA,A2s, seed {seed}: {win_prob:.1%}")
+    # Three such opponents can't be dealt at all
+    try:
+        calc.simulate(hero, flop, 3, 200, calc.compile_ranges('AA,A2s', 3))
+    except ValueError as error:
+        print(f"3 opponents: {error}")
+    else:
+        raise SystemExit("an impossible deal went through")